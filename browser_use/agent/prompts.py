@@ -1,5 +1,6 @@
 import importlib.resources
 from datetime import datetime
+from functools import cache
 from typing import TYPE_CHECKING, Optional
 
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -9,6 +10,17 @@ if TYPE_CHECKING:
 	from browser_use.browser.views import BrowserStateSummary
 
 
+@cache
+def _read_system_prompt_template() -> str:
+	"""Read system_prompt.md once per process; every Agent reuses the same template."""
+	try:
+		# This works both in development and when installed as a package
+		with importlib.resources.files('browser_use.agent').joinpath('system_prompt.md').open('r') as f:
+			return f.read()
+	except Exception as e:
+		raise RuntimeError(f'Failed to load system prompt template: {e}')
+
+
 class SystemPrompt:
 	def __init__(
 		self,
@@ -33,12 +45,7 @@ class SystemPrompt:
 
 	def _load_prompt_template(self) -> None:
 		"""Load the prompt template from the markdown file."""
-		try:
-			# This works both in development and when installed as a package
-			with importlib.resources.files('browser_use.agent').joinpath('system_prompt.md').open('r') as f:
-				self.prompt_template = f.read()
-		except Exception as e:
-			raise RuntimeError(f'Failed to load system prompt template: {e}')
+		self.prompt_template = _read_system_prompt_template()
 
 	def get_system_message(self) -> SystemMessage:
 		"""
@@ -383,7 +383,8 @@ class BrowserSession(BaseModel):
 						# Add timeout to prevent hanging on close if context is already closed
 						try:
 							async with asyncio.timeout(5):  # 5 second timeout for close operation
-								await (self.browser or self.browser_context.browser).close()
+								# launch_persistent_context() contexts have no Browser object, so close the context itself
+								await (self.browser or self.browser_context.browser or self.browser_context).close()
 						except TimeoutError:
 							self.logger.warning('⏱️ Timeout while closing browser/context - it may already be closed')
 					except Exception as e:
@@ -448,7 +449,8 @@ class BrowserSession(BaseModel):
 
 	async def kill(self) -> None:
 		"""Stop the BrowserSession even if keep_alive=True"""
-		self.keep_alive = False
+		# stop() reads keep_alive from the profile; copy it so a profile shared with other sessions is left untouched
+		self.browser_profile = self.browser_profile.model_copy(update={'keep_alive': False})
 		# self.logger.debug(
 		# 	f'⏹️ Browser browser_pid={self.browser_pid} user_data_dir= {_log_pretty_path(self.browser_profile.user_data_dir) or "<incognito>"} keep_alive={self.browser_profile.keep_alive} (close() called)'
 		# )
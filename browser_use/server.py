@@ -1,29 +1,40 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Set, Callable, Awaitable, Deque
 from datetime import datetime
 import uuid
 
 import uvicorn
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import copy
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from starlette.websockets import WebSocketState
 import asyncio
-import json
-import base64
+import orjson
 import io
 import wave
 from google.cloud import speech
+from google.api_core.exceptions import GoogleAPICallError
 import os
+import sys
 from dotenv import load_dotenv
-import threading
-import queue
-from concurrent.futures import ThreadPoolExecutor
 import subprocess
 import tempfile
+import shutil
 import time
+import hashlib
+import re
+from collections import OrderedDict, deque
+from itertools import islice
 
 # Browser-Use imports
-from browser_use import Agent
+from browser_use import Agent, AgentHistoryList
+from browser_use.browser import BrowserSession, BrowserProfile
+from langchain_core.messages import HumanMessage
+from langchain_core.rate_limiters import InMemoryRateLimiter
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 # Environment variables loading (.env file if exists)
@@ -33,60 +44,166 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Email Manager Backend")
-
-# Google Cloud Speech-to-Text client initialization
-try:
-    # Use service account key with priority
-    if os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
-        # Use service account key file
-        speech_client = speech.SpeechClient()
-        logger.info("Google Speech-to-Text client initialized with service account")
-    else:
-        speech_client = None
-        logger.warning("Google Cloud service account credentials not found. Speech-to-Text will not be available.")
-except Exception as e:
-    speech_client = None
-    logger.error(f"Failed to initialize Google Speech-to-Text client: {e}")
+# Stream writes happen on a listener thread; the event loop only enqueues records.
+# browser_use installs its own console handler (root and non-propagating 'browser_use' logger), so both are rerouted.
+class JsonLogFormatter(logging.Formatter):
+    """One orjson object per record, for log shippers (LOG_FORMAT=json)"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": int(record.created * 1000),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry).decode()
+
+class LogQueueHandler(QueueHandler):
+    """QueueHandler that keeps the traceback apart from the message.
+    
+    The stock prepare() folds the traceback into msg and clears exc_info/exc_text, so the listener's
+    formatter could never tell them apart; here it is rendered once into exc_text and kept there.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None  # Traceback objects keep frames alive; the rendered text is enough
+        return record
+
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_handlers = {handler for name in ("", "browser_use") for handler in logging.getLogger(name).handlers}
+if os.getenv('LOG_FORMAT', '').lower() == 'json':
+    for handler in log_handlers:
+        handler.setFormatter(JsonLogFormatter())
+log_listener = QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+for name in ("", "browser_use"):
+    logging.getLogger(name).handlers = [LogQueueHandler(log_queue)]
+log_listener.start()
+
+# orjson serializes the (often multi-KB) agent result strings much faster than stdlib json
+app = FastAPI(title="Email Manager Backend", default_response_class=ORJSONResponse)
+
+# Google Cloud Speech-to-Text clients (created lazily per worker, on startup or first request)
+speech_client: Optional[speech.SpeechClient] = None
+speech_async_client: Optional[speech.SpeechAsyncClient] = None
+_speech_lock = asyncio.Lock()
+
+async def get_speech_client() -> Optional[speech.SpeechClient]:
+    """Return the shared Speech-to-Text client, initializing it on first use"""
+    global speech_client
+    if speech_client is None and os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
+        async with _speech_lock:
+            if speech_client is None:
+                try:
+                    # Use service account key file (auth may block, so build off the event loop)
+                    speech_client = await asyncio.to_thread(speech.SpeechClient)
+                    logger.info("Google Speech-to-Text client initialized with service account")
+                except Exception as e:
+                    logger.error("Failed to initialize Google Speech-to-Text client: %s", e)
+    return speech_client
+
+async def get_speech_async_client() -> Optional[speech.SpeechAsyncClient]:
+    """Return the shared async Speech-to-Text client used for streaming recognition"""
+    global speech_async_client
+    if speech_async_client is None and os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
+        async with _speech_lock:
+            if speech_async_client is None:
+                try:
+                    # Created inside the running event loop so its gRPC channel binds to it
+                    speech_async_client = speech.SpeechAsyncClient()
+                    logger.info("Google Speech-to-Text streaming client initialized with service account")
+                except Exception as e:
+                    logger.error("Failed to initialize Google Speech-to-Text streaming client: %s", e)
+    return speech_async_client
+
+# LLM client (for Browser-Use Agent), created lazily per worker
+llm_client: Optional[ChatGoogleGenerativeAI] = None
+_llm_lock = asyncio.Lock()
+
+# Token bucket shared by every call through llm_client (intent analysis and all agents' steps)
+LLM_REQUESTS_PER_MINUTE = float(os.getenv('LLM_REQUESTS_PER_MINUTE', '60'))
+LLM_BURST = int(os.getenv('LLM_BURST', '5'))
+llm_rate_limiter = InMemoryRateLimiter(
+    requests_per_second=LLM_REQUESTS_PER_MINUTE / 60,
+    check_every_n_seconds=0.05,
+    max_bucket_size=LLM_BURST
+)
+
+def build_llm_client() -> ChatGoogleGenerativeAI:
+    """Create the Gemini chat client from environment configuration"""
+    # Select model from environment variable, default is gemini-2.0-flash-exp (Vision built-in)
+    model_name = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash-exp')
+    
+    # All Gemini models have built-in Vision capabilities (confirmed by Google official docs)
+    supported_models = [
+        'gemini-2.0-flash-exp',     # Latest experimental model (Vision built-in)
+        'gemini-2.0-flash',         # Stable latest model (Vision built-in)
+        'gemini-2.5-pro-exp',       # High-performance experimental model (Vision built-in)
+        'gemini-1.5-pro',           # Stable high-performance model (Vision built-in)
+        'gemini-1.5-flash',         # Fast model (Vision built-in)
+    ]
+    if model_name not in supported_models:
+        logger.warning("Model %s not in supported list. Using gemini-2.0-flash-exp", model_name)
+        model_name = 'gemini-2.0-flash-exp'
+    
+    client = ChatGoogleGenerativeAI(
+        model=model_name,
+        temperature=0.1,
+        google_api_key=os.getenv('GOOGLE_API_KEY'),
+        convert_system_message_to_human=True,  # For Gemini compatibility
+        max_tokens=512,  # Limit token usage to save quota (reduced further)
+        max_retries=1,  # Limit retry attempts
+        timeout=30,  # Set timeout (changed from request_timeout)
+        rate_limiter=llm_rate_limiter  # Wait for a token instead of hitting quota errors and retrying
+    )
+    logger.info("LLM client initialized with Google %s (Vision capabilities built-in)", model_name)
+    logger.info("✅ Computer Vision ready for Browser-Use Agent (all Gemini models support Vision)")
+    logger.info("🔧 Quota saving mode: max_tokens=512, max_retries=1, timeout=30s, %g req/min (burst %s)", LLM_REQUESTS_PER_MINUTE, LLM_BURST)
+    return client
 
-# LLM client initialization (for Browser-Use Agent)
-llm_client = None
-try:
+async def get_llm_client() -> Optional[ChatGoogleGenerativeAI]:
+    """Return the shared Gemini client, initializing it on first use"""
+    global llm_client
     # Check Google Gemini API key
-    if os.getenv('GOOGLE_API_KEY'):
-        # Select model from environment variable, default is gemini-2.0-flash-exp (Vision built-in)
-        model_name = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash-exp')
-        
-        # All Gemini models have built-in Vision capabilities (confirmed by Google official docs)
-        supported_models = [
-            'gemini-2.0-flash-exp',     # Latest experimental model (Vision built-in)
-            'gemini-2.0-flash',         # Stable latest model (Vision built-in)
-            'gemini-2.5-pro-exp',       # High-performance experimental model (Vision built-in)
-            'gemini-1.5-pro',           # Stable high-performance model (Vision built-in)
-            'gemini-1.5-flash',         # Fast model (Vision built-in)
-        ]
-        if model_name not in supported_models:
-            logger.warning(f"Model {model_name} not in supported list. Using gemini-2.0-flash-exp")
-            model_name = 'gemini-2.0-flash-exp'
-        
-        llm_client = ChatGoogleGenerativeAI(
-            model=model_name,
-            temperature=0.1,
-            google_api_key=os.getenv('GOOGLE_API_KEY'),
-            convert_system_message_to_human=True,  # For Gemini compatibility
-            max_tokens=512,  # Limit token usage to save quota (reduced further)
-            max_retries=1,  # Limit retry attempts
-            timeout=30  # Set timeout (changed from request_timeout)
-        )
-        logger.info(f"LLM client initialized with Google {model_name} (Vision capabilities built-in)")
-        logger.info("✅ Computer Vision ready for Browser-Use Agent (all Gemini models support Vision)")
-        logger.info("🔧 Quota saving mode: max_tokens=512, max_retries=1, timeout=30s")
-    else:
+    if llm_client is None and os.getenv('GOOGLE_API_KEY'):
+        async with _llm_lock:
+            if llm_client is None:
+                try:
+                    llm_client = build_llm_client()
+                except Exception as e:
+                    logger.error("Failed to initialize Gemini LLM client: %s", e)
+    return llm_client
+
+# References to background startup tasks (keeps them from being garbage collected)
+startup_tasks: set = set()
+
+@app.on_event("startup")
+async def startup_event():
+    """Start client initialization and session GC in the background so readiness is not blocked on Google auth"""
+    if not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
+        logger.warning("Google Cloud service account credentials not found. Speech-to-Text will not be available.")
+    if not os.getenv('GOOGLE_API_KEY'):
         logger.warning("GOOGLE_API_KEY not found. Browser automation will not be available.")
         logger.info("Please set GOOGLE_API_KEY in your .env file to use Gemini models")
-except Exception as e:
-    llm_client = None
-    logger.error(f"Failed to initialize Gemini LLM client: {e}")
+    
+    loop_type = type(asyncio.get_running_loop())
+    logger.info("🔁 Event loop: %s.%s", loop_type.__module__, loop_type.__name__)
+    
+    coros = [get_speech_client(), get_speech_async_client(), get_llm_client(), _gc_idle_sessions()]
+    if BROWSER_POOL_SIZE > 0:
+        coros.append(fill_browser_pool())
+    if WARM_UP_ON_STARTUP:
+        coros.append(warm_agent_path())
+    for coro in coros:
+        task = asyncio.create_task(coro)
+        startup_tasks.add(task)
+        task.add_done_callback(startup_tasks.discard)
 
 # CORS setup
 app.add_middleware(
@@ -111,11 +228,6 @@ class CommandResponse(BaseModel):
     message: str
     data: Optional[Dict[str, Any]] = None
 
-class AudioTranscriptionRequest(BaseModel):
-    audio_data: str  # Base64 encoded audio data
-    language_code: str = "en-US"  # Default to English
-    sample_rate: int = 16000
-
 class TranscriptionResponse(BaseModel):
     success: bool
     transcript: str
@@ -125,32 +237,270 @@ class TranscriptionResponse(BaseModel):
 # WebSocket connection management
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
 
 manager = ConnectionManager()
 
-# Global variable for request frequency limitation
-last_ai_request_time = 0
-AI_REQUEST_COOLDOWN = 2.0  # 2 seconds interval for AI request limitation
+def _dump(obj: Dict[str, Any]) -> bytes:
+    """Serialize a websocket message with orjson (datetimes are encoded natively)"""
+    return orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC)
+
+def _now_ms() -> int:
+    """Epoch milliseconds for message timestamps (same unit as JavaScript Date.now())"""
+    return int(time.time() * 1000)
+
+class AudioRing:
+    """Single-producer/single-consumer audio buffer between the websocket reader and the recognizer.
+    
+    Both sides run on the event loop, so a deque plus one Event replaces asyncio.Queue's
+    getter/putter futures; the consumer only waits when the buffer is empty.
+    """
+    
+    def __init__(self, capacity: int):
+        self._chunks: Deque[Optional[bytes]] = deque()
+        self._capacity = capacity
+        self._ready = asyncio.Event()
+        self.dropped = 0  # Chunks discarded because the recognizer fell behind
+    
+    def __len__(self) -> int:
+        return len(self._chunks)
+    
+    def push_nowait(self, chunk: bytes) -> bool:
+        """Append a chunk; when the buffer is full the oldest chunk is dropped and False is returned"""
+        overflow = len(self._chunks) >= self._capacity
+        if overflow:
+            self._chunks.popleft()
+            self.dropped += 1
+        self._chunks.append(chunk)
+        self._ready.set()
+        return not overflow
+    
+    def close(self):
+        """Wake the consumer with the None termination signal (never dropped)"""
+        self._chunks.append(None)
+        self._ready.set()
+    
+    async def get(self) -> Optional[bytes]:
+        while not self._chunks:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._chunks.popleft()
+    
+    def clear(self) -> int:
+        """Drop every buffered chunk and return how many were dropped"""
+        dropped = len(self._chunks)
+        self._chunks.clear()
+        return dropped
+
+# Static parts of websocket messages, reused across turns (timestamps come from _now_ms())
+READY_TEMPLATE = {
+    "type": "ready_for_next",
+    "status": "Ready for your next command",
+}
+INTERIM_TEMPLATE = {"is_final": False}
+PROCESSING_TEMPLATE = {"is_final": True, "processing": True}
+KEEP_ALIVE_ACK_TEMPLATE = {"type": "keep_alive_ack"}
+
+# Keep-alives as serialized by the extension's JSON.stringify({type: 'KEEP_ALIVE', ...})
+KEEP_ALIVE_PREFIX = '{"type":"KEEP_ALIVE"'
+KEEP_ALIVE_MESSAGE = {"type": "KEEP_ALIVE"}
+
+# Sessions idle this long without a connected websocket are evicted
+SESSION_IDLE_TIMEOUT = float(os.getenv('SESSION_IDLE_TIMEOUT', '1800'))
+SESSION_GC_INTERVAL = 60.0
 
-# Global variable for browser session reuse
-global_browser_session = None
-global_agent = None
+# Maximum number of queued messages coalesced into one websocket frame
+SEND_BATCH_LIMIT = 16
+
+# Upper bounds on tracked sessions; the least recently active one is evicted first
+MAX_ACTIVE_SESSIONS = int(os.getenv('MAX_ACTIVE_SESSIONS', '1024'))
+MAX_BROWSER_SESSIONS = int(os.getenv('MAX_BROWSER_SESSIONS', '64'))  # Each one holds a browser and a profile dir
+
+# Intent decisions that drive the server and are never streamed to the user
+INTENT_MARKERS = ("SIMPLE_GREETING", "BROWSER_ACTION:")
+
+# Exponential backoff for reopening a failed speech recognition stream
+STREAM_RETRY_BASE_DELAY = 0.5
+STREAM_RETRY_MAX_DELAY = 8.0
+WS_MAX_MESSAGE_SIZE = 1024 * 1024  # Largest accepted websocket frame; 250 ms audio chunks are a few KB
+AUDIO_BUFFER_CHUNKS = 64  # Buffered audio chunks per session while the recognizer catches up
+
+# Pre-started browsers handed to sessions on their first browser command (0 disables pre-warming)
+BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', '1'))
+browser_pool: asyncio.Queue = asyncio.Queue(maxsize=max(BROWSER_POOL_SIZE, 1))
+browser_pool_lock = asyncio.Lock()  # One filler at a time
+browser_pool_tasks: set = set()
+
+# Chromium refusing a profile dir that another browser still holds
+COLLISION_RE = re.compile(r"browser_pid.*already running", re.S)
+
+# Login state and launch flags for session browsers
+STORAGE_STATE_PATH = os.path.join(os.getcwd(), "browser_profile", "state.json")  # Saved by warm_up_profile.py
+SESSION_BROWSER_ARGS = [
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-web-security",  # Allow cross-origin requests
+    # Chromium only honours the last --disable-features flag, so keep every feature in this one list
+    "--disable-features=VizDisplayCompositor,Translate,MediaRouter,OptimizationHints",
+    # Scripted Gmail needs none of these helpers; fewer processes competing for CPU
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--mute-audio"
+]
+# Images, video and web fonts are skipped in agent browsers so Gmail loads text-only (warm_up_profile.py keeps them)
+BLOCK_HEAVY_ASSETS = os.getenv('BLOCK_HEAVY_ASSETS', 'true').lower() in ('1', 'true')
+# Matched by CDP resource type: Gmail's googleusercontent images have no file extension, so URL globs miss them
+HEAVY_RESOURCE_TYPES = ("Image", "Media", "Font")
+# Concurrent agent runs across all sessions (bounds browser CPU and LLM load, not collisions)
+AGENT_CONCURRENCY = int(os.getenv('AGENT_CONCURRENCY', '4'))
+agent_semaphore = asyncio.Semaphore(AGENT_CONCURRENCY)
+# Limit on one agent run, counted from when it gets a slot (time queued behind other sessions is not included)
+AGENT_RUN_TIMEOUT = float(os.getenv('AGENT_RUN_TIMEOUT', '60'))
+# A session agent is rebuilt (same browser) once its carried-over prompt or step history gets this large;
+# every later LLM step would otherwise resend all previous commands' steps and browser states
+AGENT_MAX_PROMPT_TOKENS = int(os.getenv('AGENT_MAX_PROMPT_TOKENS', '20000'))
+AGENT_MAX_HISTORY_STEPS = int(os.getenv('AGENT_MAX_HISTORY_STEPS', '30'))
+HISTORY_TAIL_ITEMS = 5  # Agent steps checked (newest first) for the result before scanning the whole history
+# Opt-in: verify the LLM at startup and open Gmail in pooled session browsers, so the first command is not a cold start.
+# Off by default because the verification is a paid LLM call.
+WARM_UP_ON_STARTUP = os.getenv('WARM_UP_ON_STARTUP', '').lower() in ('1', 'true')
+GMAIL_INBOX_URL = "https://mail.google.com/mail/u/0/#inbox"
+
+# Response caches to skip repeated Speech-to-Text / Gemini calls
+class ResponseCache:
+    """Small in-process LRU cache with per-entry TTL"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+# STT results are keyed by audio content hash, intent decisions by a hash of normalized transcript and context
+transcription_cache = ResponseCache(maxsize=256, ttl=float(os.getenv('STT_CACHE_TTL', '3600')))
+intent_cache = ResponseCache(maxsize=512, ttl=float(os.getenv('INTENT_CACHE_TTL', '600')))
+
+# Results of read-only agent tasks, reused while fresh so repeated checks skip the browser entirely
+skill_cache = ResponseCache(maxsize=256, ttl=float(os.getenv('SKILL_CACHE_TTL', '60')))
+# Only tasks phrased with a read verb are cached; any mailbox-changing verb still rules a task out
+_MAILBOX_READ = re.compile(
+    r"\b(check(s|ed|ing)?|show(s|ed|ing)?|read(s|ing)?|count(s|ed|ing)?|summari[sz](e|es|ed|ing)|"
+    r"search(es|ed|ing)?|list(s|ed|ing)?|find(s|ing)?|how many|what|who|any)\b",
+    re.IGNORECASE
+)
+_MAILBOX_WRITE = re.compile(
+    r"\b(send(s|ing)?|sent|repl(y|ies|ied|ying)|forward(s|ed|ing)?|delet(e|es|ed|ing)|remov(e|es|ed|ing)|"
+    r"trash(es|ed|ing)?|archiv(e|es|ed|ing)|compos(e|es|ed|ing)|draft(s|ed|ing)?|writ(e|es|ing|ten)|wrote|"
+    r"mark(s|ed|ing)?|mov(e|es|ed|ing)|label(s|ed|led|ing|ling)?|star(s|red|ring)?|unstar(s|red|ring)?|"
+    r"snooz(e|es|ed|ing)|spam|unsubscrib(e|es|ed|ing)|mut(e|es|ed|ing)|unmut(e|es|ed|ing)|"
+    r"block(s|ed|ing)?|unblock(s|ed|ing)?|report(s|ed|ing)?|empty|emptie(s|d))\b",
+    re.IGNORECASE
+)
+
+_TRANSCRIPT_PUNCTUATION = re.compile(r"[^\w\s]")
+
+def audio_cache_key(audio_data: bytes, language_code: str) -> str:
+    """Hash audio content for the transcription cache (hashlib releases the GIL on large buffers)"""
+    hasher = hashlib.sha256(audio_data)
+    hasher.update(language_code.encode())
+    return hasher.hexdigest()[:32]
+
+def normalize_transcript(transcript: str) -> str:
+    """Normalize transcript for cache lookup (case, punctuation, whitespace)"""
+    return " ".join(_TRANSCRIPT_PUNCTUATION.sub(" ", transcript.lower()).split())
+
+def skill_cache_key(task_instruction: str) -> Optional[str]:
+    """Cache key for a read-only agent task, or None when the task may change the mailbox
+    
+    Every session browser is logged in from the same saved state.json, so sessions share one mailbox and one cache entry.
+    """
+    if not _MAILBOX_READ.search(task_instruction) or _MAILBOX_WRITE.search(task_instruction):
+        return None
+    hasher = hashlib.blake2b(" ".join(task_instruction.lower().split()).encode(), digest_size=16)
+    return hasher.hexdigest()
+
+def intent_cache_key(transcript: str, context_info: str = "") -> str:
+    """Fixed-size key for the intent cache, so long conversation contexts are not stored as keys"""
+    hasher = hashlib.blake2b(normalize_transcript(transcript).encode(), digest_size=16)
+    hasher.update(b"\x00")
+    hasher.update(context_info.encode())
+    return hasher.hexdigest()
+
+# Unambiguous utterances are classified locally (matched against the whole normalized transcript) without an LLM call
+_LOCAL_INTENTS = [
+    (re.compile(r"(hello|hi|hey)( there)?|good (morning|afternoon|evening)"), "SIMPLE_GREETING"),
+    (re.compile(r"(check|show|read)( me)?( my)? unread (emails?|mails?|messages)"),
+     "BROWSER_ACTION: First check if Gmail is already open and logged in, if yes proceed directly to check unread emails in the inbox and provide a detailed summary of senders and subjects, if not logged in navigate to Gmail and login."),
+    (re.compile(r"((do i have|are there|any) )?(any )?new (emails?|mails?|messages)"),
+     "BROWSER_ACTION: First check if Gmail is already open and logged in, if yes check for new emails in the inbox and count them, if not logged in navigate to Gmail and login first."),
+]
+
+def classify_intent_locally(transcript: str) -> Optional[str]:
+    """Return the intent decision for trivially classifiable utterances, or None to ask the LLM"""
+    normalized = normalize_transcript(transcript)
+    for pattern, decision in _LOCAL_INTENTS:
+        if pattern.fullmatch(normalized):
+            return decision
+    return None
+
+# Static parts of the intent analysis prompts; only the transcript and context are filled in per call
+INTENT_PROMPT_INTRO = """
+You are a helpful assistant guiding an AI agent to issue instructions to control Gmail.
+Listen to the user's next words and convert them into a clear and concise one-sentence instruction for the AI agent to perform a task on the browser.
+
+"""
+
+INTENT_PROMPT_RULES = """Judgment rules:
+1. If the user's words are simple greetings ("hello", "hi") or unrelated conversation, respond with "SIMPLE_GREETING" only.
+2. If the user's words are related to checking, composing, or searching emails in Gmail, respond with "BROWSER_ACTION: [specific task instruction]" in the format.
+   - Example 1: "Check unread emails" -> "BROWSER_ACTION: First check if Gmail is already open and logged in, if yes proceed directly to check unread emails in the inbox and provide a detailed summary of senders and subjects, if not logged in navigate to Gmail and login."
+   - Example 2: "New email?" -> "BROWSER_ACTION: First check if Gmail is already open and logged in, if yes check for new emails in the inbox and count them, if not logged in navigate to Gmail and login first."
+   - Example 3: "Send email to Minjun" -> "BROWSER_ACTION: First check if Gmail is already open and logged in, if yes compose a new email to 'Minjun', if not logged in navigate to Gmail and login first."
+
+"""
+
+CONTEXT_INTENT_PROMPT_TAIL = '"\n\n' + INTENT_PROMPT_RULES + """Consider the conversation context when making your judgment. If the user is following up on a previous request or asking for clarification, adapt the instruction accordingly.
+
+Please make the most appropriate judgment.
+"""
 
 # 연속 대화 상태 관리를 위한 데이터 클래스들
 from dataclasses import dataclass, field
-from typing import List as TypingList
+
+# Recent turns kept verbatim; older turns are compressed into summaries
+TURN_HISTORY_LIMIT = 20
+TURN_SUMMARY_BATCH = 10
+SUMMARY_HISTORY_LIMIT = 5
 
 @dataclass
 class ConversationTurn:
@@ -163,7 +513,8 @@ class ConversationTurn:
 
 @dataclass 
 class ConversationContext:
-    turn_history: TypingList[ConversationTurn] = field(default_factory=list)
+    turn_history: Deque[ConversationTurn] = field(default_factory=lambda: deque(maxlen=TURN_HISTORY_LIMIT))
+    summary_history: Deque[ConversationTurn] = field(default_factory=lambda: deque(maxlen=SUMMARY_HISTORY_LIMIT))
     last_user_query: Optional[str] = None
     last_ai_response: Optional[str] = None
     extracted_entities: Dict[str, Any] = field(default_factory=dict)
@@ -184,14 +535,39 @@ class ContinuousConversationManager:
     """연속 대화를 관리하는 핵심 클래스"""
     
     def __init__(self):
-        self.active_sessions: Dict[str, ConversationState] = {}
-        self.browser_sessions: Dict[str, Any] = {}  # BrowserSession 객체들
+        self.active_sessions: OrderedDict[str, ConversationState] = OrderedDict()  # Least recently active first
+        self.browser_sessions: OrderedDict[str, Any] = OrderedDict()  # BrowserSession 객체들, least recently used first
+        self.session_agents: Dict[str, Agent] = {}  # Reused across commands while the session's browser lives
         self.session_websockets: Dict[str, WebSocket] = {}
-        
+        self.session_send_queues: Dict[str, asyncio.Queue] = {}  # Outgoing frames, drained by one writer task per websocket
+        self.session_writers: Dict[str, asyncio.Task] = {}
+        self._background_tasks: set = set()
+        
+    def _is_connected(self, session_id: str) -> bool:
+        """Whether the session's websocket is still open"""
+        websocket = self.session_websockets.get(session_id)
+        return websocket is not None and websocket.client_state == WebSocketState.CONNECTED
+    
     async def create_session(self, websocket: WebSocket) -> str:
         """Create new conversation session"""
         session_id = str(uuid.uuid4())
         
+        while len(self.active_sessions) >= MAX_ACTIVE_SESSIONS:
+            # Prefer the least recently active session whose websocket is already gone
+            oldest_session_id = next(
+                (sid for sid in self.active_sessions if not self._is_connected(sid)),
+                next(iter(self.active_sessions))
+            )
+            logger.warning("🗑️ Session limit reached - evicting least recently active session %s", oldest_session_id)
+            if self._is_connected(oldest_session_id):
+                # Tell the client instead of orphaning it; its endpoint then ends and winds down its tasks
+                evicted_websocket = self.session_websockets[oldest_session_id]
+                try:
+                    await evicted_websocket.close(code=1013, reason="Server session limit reached")
+                except Exception as e:
+                    logger.error("❌ Failed to close evicted websocket (session %s): %s", oldest_session_id, e)
+            await self.cleanup_session(oldest_session_id)
+        
         conversation_state = ConversationState(
             session_id=session_id,
             status='idle',
@@ -201,8 +577,11 @@ class ContinuousConversationManager:
         
         self.active_sessions[session_id] = conversation_state
         self.session_websockets[session_id] = websocket
+        send_queue: asyncio.Queue = asyncio.Queue()
+        self.session_send_queues[session_id] = send_queue
+        self.session_writers[session_id] = asyncio.create_task(self._session_writer(session_id, websocket, send_queue))
         
-        logger.info(f"🆕 New conversation session created: {session_id}")
+        logger.info("🆕 New conversation session created: %s", session_id)
         return session_id
     
     async def update_session_status(self, session_id: str, new_status: str):
@@ -210,7 +589,8 @@ class ContinuousConversationManager:
         if session_id in self.active_sessions:
             self.active_sessions[session_id].status = new_status
             self.active_sessions[session_id].last_activity = datetime.now()
-            logger.info(f"🔄 Session {session_id} status changed: {new_status}")
+            self.active_sessions.move_to_end(session_id)
+            logger.info("🔄 Session %s status changed: %s", session_id, new_status)
     
     async def add_conversation_turn(self, session_id: str, user_input: str, ai_response: str, action_performed: Optional[str] = None):
         """Record conversation turn"""
@@ -226,12 +606,45 @@ class ContinuousConversationManager:
         )
         
         state = self.active_sessions[session_id]
+        # Take the oldest turns out for summarizing before the bounded history would drop them
+        if len(state.context.turn_history) >= TURN_HISTORY_LIMIT:
+            older_turns = [state.context.turn_history.popleft() for _ in range(TURN_SUMMARY_BATCH)]
+            task = asyncio.create_task(self._summarize_older_turns(session_id, older_turns))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
         state.context.turn_history.append(turn)
         state.context.last_user_query = user_input
         state.context.last_ai_response = ai_response
         state.context.turn_count += 1
         
-        logger.info(f"📝 Session {session_id} conversation turn added (total {state.context.turn_count} turns)")
+        logger.info("📝 Session %s conversation turn added (total %s turns)", session_id, state.context.turn_count)
+    
+    async def _summarize_older_turns(self, session_id: str, older_turns: list):
+        """Store the given (already removed) oldest turns as a single summary turn"""
+        if session_id not in self.active_sessions or not older_turns:
+            return
+        
+        context = self.active_sessions[session_id].context
+        transcript = "\n".join(f"User: {turn.user_input}\nAssistant: {turn.ai_response}" for turn in older_turns)
+        summary = "; ".join(turn.user_input for turn in older_turns)  # Fallback without LLM
+        
+        llm = await get_llm_client()
+        if llm:
+            try:
+                prompt = f"Summarize this Gmail assistant conversation in 2 sentences:\n\n{transcript}"
+                response = await llm.ainvoke([HumanMessage(content=prompt)])
+                summary = response.content.strip()
+            except Exception as e:
+                logger.error("❌ Conversation summary failed (session %s): %s", session_id, e)
+        
+        context.summary_history.append(ConversationTurn(
+            id=str(uuid.uuid4()),
+            user_input="<summary>",
+            ai_response=summary,
+            timestamp=datetime.now(),
+            action_performed="summary"
+        ))
+        logger.info("🗜️ Session %s compressed %s older turns into a summary", session_id, len(older_turns))
     
     async def get_session_context(self, session_id: str) -> Optional[ConversationContext]:
         """Return session conversation context"""
@@ -239,51 +652,87 @@ class ContinuousConversationManager:
             return self.active_sessions[session_id].context
         return None
     
-    async def send_ready_signal(self, session_id: str):
-        """Send ready signal to client for next turn"""
+    async def send_to_session(self, session_id: str, payload: bytes):
+        """Queue a serialized message for the session's writer task"""
+        send_queue = self.session_send_queues.get(session_id)
+        if send_queue is None:
+            return
+        send_queue.put_nowait(payload)
+    
+    async def _session_writer(self, session_id: str, websocket: WebSocket, send_queue: asyncio.Queue):
+        """Send queued messages, coalescing whatever piled up during the previous send into one NDJSON frame"""
+        try:
+            while True:
+                batch = [await send_queue.get()]
+                while not send_queue.empty() and len(batch) < SEND_BATCH_LIMIT:
+                    batch.append(send_queue.get_nowait())
+                await websocket.send_bytes(b"\n".join(batch))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("❌ Session %s writer stopped: %s", session_id, e)
+    
+    async def send_ready_signal(self, session_id: str, response: Optional[Dict[str, Any]] = None):
+        """Send ready signal to client for next turn, optionally carrying the turn's final response"""
         if session_id not in self.session_websockets:
             return
             
-        websocket = self.session_websockets[session_id]
         ready_message = {
-            "type": "ready_for_next",
-            "status": "Ready for your next command",
+            **READY_TEMPLATE,
+            **(response or {}),
             "session_id": session_id,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_ms()
         }
         
         try:
-            await websocket.send_text(json.dumps(ready_message))
+            await self.send_to_session(session_id, _dump(ready_message))
             await self.update_session_status(session_id, 'ready_for_input')
-            logger.info(f"🔄 Session {session_id} ready signal sent")
+            logger.info("🔄 Session %s ready signal sent", session_id)
         except Exception as e:
-            logger.error(f"❌ Failed to send ready signal (session {session_id}): {e}")
+            logger.error("❌ Failed to send ready signal (session %s): %s", session_id, e)
+    
+    @staticmethod
+    def browser_profile_dir(session_id: str) -> str:
+        """Session-specific user_data_dir"""
+        return os.path.join(os.getcwd(), f"browser_profile_{session_id}")
     
-    def get_or_create_browser_session(self, session_id: str):
+    async def get_or_create_browser_session(self, session_id: str):
         """Get or create browser instance for session"""
-        if session_id not in self.browser_sessions:
-            # Create session-specific user_data_dir
-            browser_profile_dir = f"browser_use/browser_profile_{session_id}"
+        if session_id in self.browser_sessions:
+            self.browser_sessions.move_to_end(session_id)
+        else:
+            while len(self.browser_sessions) >= MAX_BROWSER_SESSIONS:
+                oldest_session_id = next(iter(self.browser_sessions))
+                logger.warning("🗑️ Browser limit reached - closing least recently used browser of session %s", oldest_session_id)
+                await self.close_browser_session(oldest_session_id)
             # Browser session will be created when needed
             self.browser_sessions[session_id] = None
-            logger.info(f"🌐 Browser profile prepared for session {session_id}: {browser_profile_dir}")
+            logger.info("🌐 Browser profile prepared for session %s: %s", session_id, self.browser_profile_dir(session_id))
         
         return self.browser_sessions.get(session_id)
     
+    async def close_browser_session(self, session_id: str):
+        """Stop the session's browser and delete its profile directory"""
+        browser_session = self.browser_sessions.pop(session_id, None)
+        self.session_agents.pop(session_id, None)
+        profile_dir = self.browser_profile_dir(session_id)
+        if browser_session is not None:
+            # Pre-warmed browsers were started with their own profile directory
+            profile_dir = browser_session.browser_profile.user_data_dir or profile_dir
+            try:
+                # keep_alive=True makes stop() a no-op; kill() turns it off on the profile and closes the browser
+                await browser_session.kill()
+                logger.info("🌐 Browser cleanup completed for session %s", session_id)
+            except Exception as e:
+                logger.error("❌ Browser cleanup failed (session %s): %s", session_id, e)
+        await asyncio.to_thread(shutil.rmtree, profile_dir, ignore_errors=True)
+    
     async def cleanup_session(self, session_id: str):
         """Clean up session (including browser)"""
-        logger.info(f"🧹 Starting cleanup for session {session_id}")
+        logger.info("🧹 Starting cleanup for session %s", session_id)
         
         # Clean up browser session
-        if session_id in self.browser_sessions and self.browser_sessions[session_id]:
-            try:
-                browser_session = self.browser_sessions[session_id]
-                if hasattr(browser_session, 'stop'):
-                    browser_session.stop()
-                del self.browser_sessions[session_id]
-                logger.info(f"🌐 Browser cleanup completed for session {session_id}")
-            except Exception as e:
-                logger.error(f"❌ Browser cleanup failed (session {session_id}): {e}")
+        await self.close_browser_session(session_id)
         
         # Clean up conversation state
         if session_id in self.active_sessions:
@@ -291,16 +740,32 @@ class ContinuousConversationManager:
         
         if session_id in self.session_websockets:
             del self.session_websockets[session_id]
+        self.session_send_queues.pop(session_id, None)
+        writer = self.session_writers.pop(session_id, None)
+        if writer is not None:
+            writer.cancel()
             
-        logger.info(f"✅ Session {session_id} cleanup completed")
+        logger.info("✅ Session %s cleanup completed", session_id)
 
 # 전역 연속 대화 매니저 인스턴스
 conversation_manager = ContinuousConversationManager()
 
+async def _gc_idle_sessions():
+    """Periodically evict sessions whose websocket is gone and that have been idle too long"""
+    while True:
+        await asyncio.sleep(SESSION_GC_INTERVAL)
+        now = datetime.now()
+        for session_id, state in list(conversation_manager.active_sessions.items()):
+            if conversation_manager._is_connected(session_id):
+                continue
+            if (now - state.last_activity).total_seconds() > SESSION_IDLE_TIMEOUT:
+                logger.info("🗑️ Evicting idle session %s", session_id)
+                await conversation_manager.cleanup_session(session_id)
+
 @app.post("/api/command", response_model=CommandResponse)
 async def process_command(request: CommandRequest):
     try:
-        logger.info(f"Received command: {request.command}")
+        logger.info("Received command: %s", request.command)
         
         # Here implement the actual command processing logic
         # For example: summarizing emails, generating replies, etc.
@@ -311,15 +776,20 @@ async def process_command(request: CommandRequest):
             data={"status": "processed"}
         )
     except Exception as e:
-        logger.error(f"Error processing command: {str(e)}")
+        logger.error("Error processing command: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/transcribe", response_model=TranscriptionResponse)
-async def transcribe_audio(request: AudioTranscriptionRequest):
+async def transcribe_audio(
+    file: UploadFile = File(...),  # Raw audio bytes (multipart upload, no Base64)
+    language_code: str = Form("en-US"),  # Default to English
+    sample_rate: int = Form(16000)
+):
     """
     Use Google Speech-to-Text API to convert audio to text
     """
-    if not speech_client:
+    client = await get_speech_client()
+    if not client:
         return TranscriptionResponse(
             success=False,
             transcript="",
@@ -328,14 +798,25 @@ async def transcribe_audio(request: AudioTranscriptionRequest):
         )
     
     try:
-        # Base64 decoding
-        audio_data = base64.b64decode(request.audio_data)
+        # Uploaded audio goes to the API as-is
+        audio_data = await file.read()
+        
+        # Identical audio returns the cached transcript without another API call
+        cache_key = await asyncio.to_thread(audio_cache_key, audio_data, language_code)
+        cached = transcription_cache.get(cache_key)
+        if cached is not None:
+            logger.info("⚡ Transcription cache hit: %s", cached[0])
+            return TranscriptionResponse(
+                success=True,
+                transcript=cached[0],
+                confidence=cached[1]
+            )
         
         # Google Speech-to-Text setup (automatic sampling rate detection)
         config = speech.RecognitionConfig(
             encoding=speech.RecognitionConfig.AudioEncoding.WEBM_OPUS,  # Commonly used in web
-            # sample_rate_hertz=request.sample_rate,  # Removed for automatic detection
-            language_code=request.language_code,
+            # sample_rate_hertz=sample_rate,  # Removed for automatic detection
+            language_code=language_code,
             enable_automatic_punctuation=True,  # Automatic punctuation
             enable_word_time_offsets=True,  # Word-level timestamp
             model="latest_long",  # Use latest model
@@ -343,15 +824,16 @@ async def transcribe_audio(request: AudioTranscriptionRequest):
         
         audio = speech.RecognitionAudio(content=audio_data)
         
-        # Speech recognition
-        response = speech_client.recognize(config=config, audio=audio)
+        # Speech recognition (blocking gRPC call, kept off the event loop)
+        response = await asyncio.to_thread(client.recognize, config=config, audio=audio)
         
         if response.results:
             result = response.results[0]
             transcript = result.alternatives[0].transcript
             confidence = result.alternatives[0].confidence
             
-            logger.info(f"Transcription successful: {transcript}")
+            logger.info("Transcription successful: %s", transcript)
+            transcription_cache.set(cache_key, (transcript, confidence))
             
             return TranscriptionResponse(
                 success=True,
@@ -367,7 +849,7 @@ async def transcribe_audio(request: AudioTranscriptionRequest):
             )
             
     except Exception as e:
-        logger.error(f"Transcription error: {str(e)}")
+        logger.error("Transcription error: %s", e)
         return TranscriptionResponse(
             success=False,
             transcript="",
@@ -379,11 +861,15 @@ async def transcribe_audio(request: AudioTranscriptionRequest):
 async def websocket_speech_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint supporting continuous conversation
+
+    Audio must be sent as binary frames (ws.send(blob)), not Base64 strings;
+    text frames are reserved for JSON control messages.
     """
     await manager.connect(websocket)
     
-    if not speech_client:
-        await websocket.send_text(json.dumps({
+    streaming_client = await get_speech_async_client()
+    if not streaming_client:
+        await websocket.send_bytes(_dump({
             "error": "Google Speech-to-Text service not available"
         }))
         return
@@ -393,8 +879,11 @@ async def websocket_speech_endpoint(websocket: WebSocket):
     
     try:
         # Session-specific audio queue and events
-        audio_queue = queue.Queue()
-        stop_event = threading.Event()
+        audio_queue = AudioRing(AUDIO_BUFFER_CHUNKS)
+        stop_event = asyncio.Event()
+        
+        # Serialized keep-alive ack up to the timestamp value; only the timestamp changes per ack
+        keep_alive_ack_prefix = _dump({**KEEP_ALIVE_ACK_TEMPLATE, "session_id": session_id})[:-1] + b',"timestamp":'
         
         # Streaming configuration
         config = speech.StreamingRecognitionConfig(
@@ -417,332 +906,266 @@ async def websocket_speech_endpoint(websocket: WebSocket):
         )
         
         # Audio request generator
-        def generate_requests():
-            logger.info(f"🎙️ [Session {session_id}] Audio request generator started")
+        async def generate_requests(first_chunk: bytes):
+            logger.info("🎙️ [Session %s] Audio request generator started", session_id)
+            # The async client expects the streaming configuration as the first request
+            yield speech.StreamingRecognizeRequest(streaming_config=config)
+            yield speech.StreamingRecognizeRequest(audio_content=first_chunk)
             while not stop_event.is_set():
-                try:
-                    chunk = audio_queue.get(timeout=1.0)
-                    if chunk is None:
-                        logger.info(f"🛑 [Session {session_id}] Generator received termination signal")
-                        break
-                    if len(chunk) > 0:
-                        logger.debug(f"🎵 [Session {session_id}] Yielding audio chunk: {len(chunk)} bytes")
-                        yield speech.StreamingRecognizeRequest(audio_content=chunk)
-                except queue.Empty:
-                    logger.debug(f"⏰ [Session {session_id}] Audio queue timeout, continuing...")
-                    continue
-                except Exception as e:
-                    logger.error(f"[Session {session_id}] Generator error: {str(e)}")
+                chunk = await audio_queue.get()
+                if chunk is None:
+                    logger.info("🛑 [Session %s] Generator received termination signal", session_id)
                     break
-            logger.info(f"🏁 [Session {session_id}] Audio request generator terminated")
+                if len(chunk) > 0:
+                    logger.debug("🎵 [Session %s] Yielding audio chunk: %d bytes", session_id, len(chunk))
+                    yield speech.StreamingRecognizeRequest(audio_content=chunk)
+            logger.info("🏁 [Session %s] Audio request generator terminated", session_id)
         
-        # 메인 이벤트 루프 참조
-        main_loop = asyncio.get_running_loop()
+        # Finalized transcripts, consumed by the AI turn task while recognition keeps streaming
+        turn_queue: asyncio.Queue = asyncio.Queue()
         
-        # Speech processing thread for continuous conversation
-        def process_speech():
+        # Speech processing task for continuous conversation
+        async def process_speech():
             try:
-                logger.info(f"🎤 [Session {session_id}] Google Speech API streaming started")
-                asyncio.run_coroutine_threadsafe(
-                    conversation_manager.update_session_status(session_id, 'listening'), 
-                    main_loop
-                ).result()
+                logger.info("🎤 [Session %s] Google Speech API streaming started", session_id)
+                await conversation_manager.update_session_status(session_id, 'listening')
+                retry_delay = STREAM_RETRY_BASE_DELAY
                 
-                # Infinite loop for continuous conversation
+                # One stream per utterance: it is closed at the final result (the client pauses audio while the
+                # turn runs, which would otherwise idle the stream into Google's audio timeout) and reopened on the next chunk
                 while not stop_event.is_set():
                     try:
-                        # Clear queue before starting new stream
-                        while not audio_queue.empty():
-                            try:
-                                audio_queue.get_nowait()
-                            except queue.Empty:
-                                break
-                        
                         # Wait for audio data before starting stream to avoid timeout
-                        logger.info(f"⏳ [Session {session_id}] Waiting for audio data before starting stream...")
-                        first_chunk = None
-                        try:
-                            # Wait for first audio chunk (blocking) - increased timeout for continuous conversation
-                            first_chunk = audio_queue.get(timeout=300.0)  # Wait up to 5 minutes
-                            if first_chunk is None:
-                                logger.info(f"🛑 [Session {session_id}] Received termination signal, exiting")
-                                break
-                        except queue.Empty:
-                            logger.info(f"⏰ [Session {session_id}] No audio data received in 5 minutes, continuing to wait...")
-                            # In continuous mode, keep waiting instead of breaking
-                            if asyncio.run_coroutine_threadsafe(
-                                websocket.send_text(json.dumps({
-                                    "type": "ping",
-                                    "message": "Still listening for your command...",
-                                    "session_id": session_id
-                                })), 
-                                main_loop
-                            ).result(timeout=1.0):
-                                continue
-                            else:
-                                logger.warning(f"[Session {session_id}] Failed to send ping, connection may be lost")
-                                break
-                        
-                        # Put the first chunk back for the generator
-                        audio_queue.put(first_chunk)
+                        # (dead peers are detected by websocket ping frames, so no timeout is needed here)
+                        logger.info("⏳ [Session %s] Waiting for audio data before starting stream...", session_id)
+                        first_chunk = await audio_queue.get()
+                        if first_chunk is None:
+                            logger.info("🛑 [Session %s] Received termination signal, exiting", session_id)
+                            break
                         
-                        logger.info(f"🔄 [Session {session_id}] Starting new speech recognition stream with audio data")
-                        requests_iterator = generate_requests()
-                        responses = speech_client.streaming_recognize(config, requests_iterator)
-                        logger.info(f"✅ [Session {session_id}] Speech recognition stream created successfully")
+                        logger.info("🔄 [Session %s] Starting speech recognition stream with audio data", session_id)
+                        responses = await streaming_client.streaming_recognize(
+                            requests=generate_requests(first_chunk)
+                        )
+                        logger.info("✅ [Session %s] Speech recognition stream created successfully", session_id)
                         
-                        for response in responses:
-                            if stop_event.is_set():
-                                logger.info(f"🛑 [Session {session_id}] Stop event detected")
-                                return
-                            
-                            # Error check
-                            if response.error.code != 0:
-                                logger.error(f"[Session {session_id}] Speech API error: {response.error.message}")
-                                continue
+                        try:
+                            utterance_done = False
+                            async for response in responses:
+                                if stop_event.is_set():
+                                    logger.info("🛑 [Session %s] Stop event detected", session_id)
+                                    return
                                 
-                            for result in response.results:
-                                if not result.alternatives:
+                                # Error check
+                                if response.error.code != 0:
+                                    logger.error("[Session %s] Speech API error: %s", session_id, response.error.message)
                                     continue
-                                    
-                                transcript = result.alternatives[0].transcript
-                                confidence = getattr(result.alternatives[0], 'confidence', 1.0)
                                 
-                                logger.info(f"📝 [Session {session_id}] Recognition result: {transcript} (final: {result.is_final})")
+                                retry_delay = STREAM_RETRY_BASE_DELAY
                                 
-                                if result.is_final:
-                                    # Final result - update session status
-                                    asyncio.run_coroutine_threadsafe(
-                                        conversation_manager.update_session_status(session_id, 'processing_stt'), 
-                                        main_loop
-                                    ).result()
+                                if response.speech_event_type == speech.StreamingRecognizeResponse.SpeechEventType.SPEECH_ACTIVITY_END:
+                                    logger.debug("🔇 [Session %s] Speech activity ended", session_id)
                                     
-                                    logger.info(f"🤖 [Session {session_id}] Sending command to AI agent: {transcript}")
-                                    
-                                    # Step 1: Processing start notification
-                                    processing_message = json.dumps({
-                                        "transcript": transcript,
-                                        "confidence": confidence,
-                                        "is_final": True,
-                                        "processing": True,
-                                        "status": "Processing your request...",
-                                        "session_id": session_id,
-                                        "timestamp": datetime.now().isoformat()
-                                    })
+                                for result in response.results:
+                                    if not result.alternatives:
+                                        continue
+                                        
+                                    transcript = result.alternatives[0].transcript
+                                    confidence = getattr(result.alternatives[0], 'confidence', 1.0)
                                     
-                                    try:
-                                        future = asyncio.run_coroutine_threadsafe(
-                                            websocket.send_text(processing_message), 
-                                            main_loop
-                                        )
-                                        future.result(timeout=1.0)
-                                        logger.info(f"✅ [Session {session_id}] Processing start notification sent")
-                                    except Exception as send_error:
-                                        logger.error(f"[Session {session_id}] Failed to send processing start notification: {str(send_error)}")
+                                    logger.info("📝 [Session %s] Recognition result: %s (final: %s)", session_id, transcript, result.is_final)
                                     
-                                    # Step 2: Execute AI processing
-                                    try:
-                                        # Session context-based AI processing
-                                        future = asyncio.run_coroutine_threadsafe(
-                                            handle_final_transcript_with_session(session_id, websocket, transcript, confidence), 
-                                            main_loop
-                                        )
-                                        ai_response = future.result(timeout=60.0)
-                                        
-                                        # Step 3: Record conversation turn
-                                        asyncio.run_coroutine_threadsafe(
-                                            conversation_manager.add_conversation_turn(session_id, transcript, ai_response), 
-                                            main_loop
-                                        ).result()
-                                        
-                                        # Step 4: Send ready signal for next turn
-                                        asyncio.run_coroutine_threadsafe(
-                                            conversation_manager.send_ready_signal(session_id), 
-                                            main_loop
-                                        ).result()
-                                        
-                                        logger.info(f"🔄 [Session {session_id}] Continuous conversation mode: Waiting for next command...")
-                                        
-                                        # IMPORTANT: Break the current stream to start a new one for continuous conversation
-                                        logger.info(f"🔄 [Session {session_id}] Breaking current stream to start fresh for next command")
-                                        break  # Exit the response loop to start a new stream
-                                        
-                                    except Exception as e:
-                                        logger.error(f"[Session {session_id}] Final speech processing error: {str(e)}")
-                                        
-                                        # Send error message
-                                        error_message = json.dumps({
+                                    if result.is_final:
+                                        # Final result marks the turn boundary - hand it to the AI turn task
+                                        await conversation_manager.update_session_status(session_id, 'processing_stt')
+                                        turn_queue.put_nowait((transcript, confidence))
+                                        utterance_done = True
+                                    else:
+                                        # Interim result
+                                        message = _dump({
+                                            **INTERIM_TEMPLATE,
                                             "transcript": transcript,
-                                            "confidence": confidence,
-                                            "is_final": True,
-                                            "ai_response": f"Sorry, there was an issue processing your command: {str(e)}",
-                                            "session_id": session_id,
-                                            "timestamp": datetime.now().isoformat()
+                                            "session_id": session_id
                                         })
                                         
                                         try:
-                                            future = asyncio.run_coroutine_threadsafe(
-                                                websocket.send_text(error_message), 
-                                                main_loop
-                                            )
-                                            future.result(timeout=1.0)
-                                            
-                                            # Send ready signal even after error for continuous conversation
-                                            asyncio.run_coroutine_threadsafe(
-                                                conversation_manager.send_ready_signal(session_id), 
-                                                main_loop
-                                            ).result()
-                                            
-                                        except Exception as send_error:
-                                            logger.error(f"[Session {session_id}] Failed to send error message: {str(send_error)}")
-                                else:
-                                    # Interim result
-                                    message = json.dumps({
-                                        "transcript": transcript,
-                                        "is_final": False,
-                                        "session_id": session_id
-                                    })
-                                    
-                                    try:
-                                        future = asyncio.run_coroutine_threadsafe(
-                                            websocket.send_text(message), 
-                                            main_loop
-                                        )
-                                        future.result(timeout=1.0)
-                                    except Exception as e:
-                                        logger.error(f"[Session {session_id}] Interim result send error: {str(e)}")
-                    
-                    except Exception as stream_error:
-                        logger.error(f"[Session {session_id}] Speech stream error: {str(stream_error)}")
-                        if not stop_event.is_set():
-                            logger.info(f"🔄 [Session {session_id}] Attempting to restart speech stream...")
-                            
-                            # Clear queue before restart
-                            queue_size = audio_queue.qsize()
-                            logger.info(f"📊 [Session {session_id}] Clearing audio queue (size: {queue_size})")
-                            while not audio_queue.empty():
-                                try:
-                                    audio_queue.get_nowait()
-                                except queue.Empty:
+                                            await conversation_manager.send_to_session(session_id, message)
+                                        except Exception as e:
+                                            logger.error("[Session %s] Interim result send error: %s", session_id, e)
+                                
+                                if utterance_done:
+                                    logger.info("🔚 [Session %s] Utterance finalized, closing stream until the next audio", session_id)
                                     break
-                            logger.info(f"✅ [Session {session_id}] Audio queue cleared, waiting 2 seconds before restart")
-                            time.sleep(2)
-                            continue
-                        else:
-                            logger.info(f"🛑 [Session {session_id}] Stop event set, breaking from stream loop")
+                            else:
+                                logger.info("🔚 [Session %s] Speech recognition stream closed by server", session_id)
+                        finally:
+                            responses.cancel()
+                    
+                    except GoogleAPICallError as stream_error:
+                        logger.error("[Session %s] Speech stream error: %s", session_id, stream_error)
+                        if stop_event.is_set():
+                            logger.info("🛑 [Session %s] Stop event set, breaking from stream loop", session_id)
                             break
+                        
+                        # Clear queue before restart
+                        queue_size = audio_queue.clear()
+                        logger.info("📊 [Session %s] Cleared audio queue (size: %s)", session_id, queue_size)
+                        logger.info("🔄 [Session %s] Restarting speech stream in %.1f seconds", session_id, retry_delay)
+                        await asyncio.sleep(retry_delay)
+                        retry_delay = min(retry_delay * 2, STREAM_RETRY_MAX_DELAY)
                             
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"[Session {session_id}] Speech processing error: {str(e)}")
+                logger.error("[Session %s] Speech processing error: %s", session_id, e)
                 try:
-                    future = asyncio.run_coroutine_threadsafe(
-                        websocket.send_text(json.dumps({
-                            "error": str(e),
-                            "session_id": session_id
-                        })),
-                        main_loop
-                    )
-                    future.result(timeout=1.0)
+                    await conversation_manager.send_to_session(session_id, _dump({
+                        "error": str(e),
+                        "session_id": session_id
+                    }))
                 except Exception as send_error:
-                    logger.error(f"[Session {session_id}] Failed to send error message: {str(send_error)}")
+                    logger.error("[Session %s] Failed to send error message: %s", session_id, send_error)
                     
             finally:
-                logger.info(f"🏁 [Session {session_id}] Speech processing thread terminated")
-        
-        # Start Speech processing thread
-        speech_thread = threading.Thread(target=process_speech)
-        speech_thread.start()
+                turn_queue.put_nowait(None)
+                logger.info("🏁 [Session %s] Speech processing task terminated", session_id)
         
-        # Receive data from WebSocket (both audio and control messages)
-        try:
-            logger.info("🔗 WebSocket audio reception start")
+        # AI processing task - runs each finalized transcript through the agent
+        async def process_turns():
             while True:
+                turn = await turn_queue.get()
+                if turn is None or stop_event.is_set():
+                    break
+                transcript, confidence = turn
+                
+                logger.info("🤖 [Session %s] Sending command to AI agent: %s", session_id, transcript)
+                
+                # Step 1: Processing start notification (one frame, Gmail-specific status when relevant)
+                processing_message = _dump({
+                    **PROCESSING_TEMPLATE,
+                    "transcript": transcript,
+                    "confidence": confidence,
+                    "status": "Analyzing your request and opening Gmail..." if "email" in transcript.lower() else "Processing your request...",
+                    "session_id": session_id,
+                    "timestamp": _now_ms()
+                })
+                
                 try:
-                    # Use generic receive to handle both bytes and text
-                    message = await websocket.receive()
+                    await conversation_manager.send_to_session(session_id, processing_message)
+                    logger.info("✅ [Session %s] Processing start notification sent", session_id)
+                except Exception as send_error:
+                    logger.error("[Session %s] Failed to send processing start notification: %s", session_id, send_error)
+                
+                # Step 2: Execute AI processing
+                try:
+                    # Session context-based AI processing
+                    # The agent run is timed inside, once it has a slot; LLM calls carry their own timeout
+                    ai_response = await handle_final_transcript_with_session(session_id, websocket, transcript, confidence)
                     
-                    if "bytes" in message:
-                        # Audio data
-                        data = message["bytes"]
-                        if not data:
-                            logger.info("📭 Empty data reception, connection end")
-                            break
-                        
-                        logger.debug(f"📥 Received audio chunk: {len(data)} bytes")
-                        # Add audio data to queue (immediate processing)
-                        audio_queue.put(data)
-                        
-                    elif "text" in message:
-                        # Control message
-                        try:
-                            control_msg = json.loads(message["text"])
-                            if control_msg.get("type") == "STOP_RECORDING":
-                                logger.info(f"🛑 [Session {session_id}] Stop recording signal received: {control_msg.get('reason', 'No reason provided')}")
-                                stop_event.set()
-                                audio_queue.put(None)  # Signal to stop audio processing
-                                break
-                            elif control_msg.get("type") == "KEEP_ALIVE":
-                                logger.debug(f"📡 [Session {session_id}] Keep-alive message received")
-                                # Send acknowledgment
-                                await websocket.send_text(json.dumps({
-                                    "type": "keep_alive_ack",
-                                    "session_id": session_id,
-                                    "timestamp": datetime.now().isoformat()
-                                }))
-                        except json.JSONDecodeError:
-                            logger.warning(f"[Session {session_id}] Invalid JSON control message: {message['text']}")
+                    # Step 3: Record conversation turn
+                    await conversation_manager.add_conversation_turn(session_id, transcript, ai_response)
+                    
+                    logger.info("🔄 [Session %s] Continuous conversation mode: Waiting for next command...", session_id)
                     
-                    elif message.get("type") == "websocket.disconnect":
-                        logger.info(f"🔌 [Session {session_id}] WebSocket disconnect received")
-                        break
-                        
-                except asyncio.CancelledError:
-                    logger.info("⚠️ WebSocket reception canceled")
-                    break
                 except Exception as e:
-                    logger.error(f"Audio reception error: {str(e)}")
-                    break
+                    logger.error("[Session %s] Final speech processing error: %s", session_id, e)
+                    ai_response = f"Sorry, there was an issue processing your command: {str(e)}"
                 
-        except WebSocketDisconnect:
-            logger.info(f"🔌 [Session {session_id}] WebSocket normal disconnection")
-        except Exception as e:
-            logger.error(f"[Session {session_id}] WebSocket processing error: {str(e)}")
-        finally:
-            # Cleanup tasks
-            logger.info(f"🧹 [Session {session_id}] Starting cleanup")
-            stop_event.set()
-            audio_queue.put(None)  # Termination signal
-            
-            # Wait for thread termination
-            if speech_thread.is_alive():
-                logger.info(f"⏳ [Session {session_id}] Waiting for speech thread termination...")
-                speech_thread.join(timeout=5.0)
-                if speech_thread.is_alive():
-                    logger.warning(f"⚠️ [Session {session_id}] Speech thread did not terminate normally")
-                else:
-                    logger.info(f"✅ [Session {session_id}] Speech thread terminated normally")
-            
-            # Session cleanup
-            await conversation_manager.cleanup_session(session_id)
+                # Step 4: Final response and ready signal for next turn go out in a single frame
+                await conversation_manager.send_ready_signal(session_id, {
+                    "transcript": transcript,
+                    "confidence": confidence,
+                    "is_final": True,
+                    "ai_response": ai_response,
+                    "processing": False
+                })
             
-            # Remove from connection manager
-            manager.disconnect(websocket)
-            logger.info(f"🏁 [Session {session_id}] WebSocket endpoint cleanup completed")
+            logger.info("🏁 [Session %s] AI turn task terminated", session_id)
+        
+        def signal_stop():
+            """Stop the recognizer and wake it if it is waiting for audio (idempotent)"""
+            if stop_event.is_set():
+                return
+            stop_event.set()
+            audio_queue.close()
+        
+        # Receive data from WebSocket (both audio and control messages)
+        async def receive_audio():
+            try:
+                logger.info("🔗 WebSocket audio reception start")
+                while True:
+                    try:
+                        # Use generic receive to handle both bytes and text
+                        message = await websocket.receive()
+                        
+                        # One lookup per key; ASGI servers may also send the unused key as None
+                        data = message.get("bytes")
+                        if data is not None:
+                            # Audio data
+                            if not data:
+                                logger.info("📭 Empty data reception, connection end")
+                                break
+                            
+                            # Per-chunk logging is lazy so no message string is built unless debug is on
+                            logger.debug("📥 Received audio chunk: %d bytes", len(data))
+                            # Add audio data to queue (immediate processing); the frame's bytes object is handed over as-is
+                            if not audio_queue.push_nowait(data):
+                                logger.warning("[Session %s] Audio queue full, dropped oldest chunk (%s dropped so far)", session_id, audio_queue.dropped)
+                            
+                        elif (text := message.get("text")) is not None:
+                            # Control message (kept on text frames: audio chunks cannot be told apart from JSON by their first byte)
+                            try:
+                                if text.startswith(KEEP_ALIVE_PREFIX):
+                                    control_msg = KEEP_ALIVE_MESSAGE  # Most frequent control message, matched without parsing
+                                else:
+                                    control_msg = orjson.loads(text)
+                                if control_msg.get("type") == "STOP_RECORDING":
+                                    logger.info("🛑 [Session %s] Stop recording signal received: %s", session_id, control_msg.get('reason', 'No reason provided'))
+                                    break
+                                elif control_msg.get("type") == "KEEP_ALIVE":
+                                    logger.debug("📡 [Session %s] Keep-alive message received", session_id)
+                                    # Send acknowledgment
+                                    await conversation_manager.send_to_session(
+                                        session_id, keep_alive_ack_prefix + str(_now_ms()).encode() + b"}"
+                                    )
+                            except orjson.JSONDecodeError:
+                                logger.warning("[Session %s] Invalid JSON control message: %s", session_id, text)
+                        
+                        elif message["type"] == "websocket.disconnect":
+                            logger.info("🔌 [Session %s] WebSocket disconnect received", session_id)
+                            break
+                            
+                    except asyncio.CancelledError:
+                        logger.info("⚠️ WebSocket reception canceled")
+                        break
+                    except Exception as e:
+                        logger.error("Audio reception error: %s", e)
+                        break
+                    
+            except WebSocketDisconnect:
+                logger.info("🔌 [Session %s] WebSocket normal disconnection", session_id)
+            except Exception as e:
+                logger.error("[Session %s] WebSocket processing error: %s", session_id, e)
+            finally:
+                # Reception ended - let the recognizer finish on its own
+                signal_stop()
+        
+        # Audio reception, speech recognition and AI turns run side by side on the event loop.
+        # Reception ending closes the audio buffer, which ends the recognizer, which ends the turn task;
+        # if the endpoint itself is cancelled the group cancels all three.
+        async with asyncio.TaskGroup() as session_tasks:
+            session_tasks.create_task(receive_audio())
+            session_tasks.create_task(process_speech())
+            session_tasks.create_task(process_turns())
+        logger.info("✅ [Session %s] Speech task terminated normally", session_id)
 
     except Exception as e:
-        logger.error(f"[Session {session_id}] WebSocket endpoint error: {str(e)}")
+        logger.error("[Session %s] WebSocket endpoint error: %s", session_id, e)
     finally:
-        # Final cleanup
-        if 'stop_event' in locals():
-            stop_event.set()
-        if 'audio_queue' in locals():
-            try:
-                audio_queue.put(None)
-            except:
-                pass
-        if 'session_id' in locals():
-            await conversation_manager.cleanup_session(session_id)
+        # Final cleanup (the session tasks have already finished or been cancelled by the task group)
+        await conversation_manager.cleanup_session(session_id)
         manager.disconnect(websocket)
+        logger.info("🏁 [Session %s] WebSocket endpoint cleanup completed", session_id)
 
 async def audio_stream_generator(websocket: WebSocket):
     """
@@ -758,7 +1181,7 @@ async def audio_stream_generator(websocket: WebSocket):
     except WebSocketDisconnect:
         logger.info("WebSocket connection end")
     except Exception as e:
-        logger.error(f"WebSocket error: {str(e)}")
+        logger.error("WebSocket error: %s", e)
         raise
 
 @app.get("/api/health")
@@ -778,45 +1201,11 @@ async def speech_status():
         "service": "Google Cloud Speech-to-Text" if speech_client else "Not configured"
     }
 
-# Real-time AI response processing function
-async def send_transcript_and_process(websocket: WebSocket, transcript: str, confidence: float):
-    """Send speech recognition result to client and process AI agent"""
-    try:
-        # Simple greeting response immediately (without Browser-Use Agent)
-        transcript_lower = transcript.lower()
-        if "hello" in transcript_lower or "hi" in transcript_lower:
-            ai_response = "Hello! I'm here to help you manage your Gmail emails. What can I do for you?"
-        else:
-            # Process with Browser-Use Agent
-            ai_response = await process_voice_command_async(transcript)
-        
-        # Send final result to client
-        await websocket.send_text(json.dumps({
-            "transcript": transcript,
-            "confidence": confidence,
-            "is_final": True,
-            "ai_response": ai_response,
-            "timestamp": datetime.now().isoformat()
-        }))
-        
-        logger.info(f"✅ Real-time response sent completed: {transcript[:50]}...")
-        
-    except Exception as e:
-        logger.error(f"AI response processing error: {str(e)}")
-        # Send basic speech recognition result even if error occurs
-        await websocket.send_text(json.dumps({
-            "transcript": transcript,
-            "confidence": confidence,
-            "is_final": True,
-            "error": "Error occurred during AI processing",
-            "timestamp": datetime.now().isoformat()
-        }))
-
 # Session-based final speech processing function
 async def handle_final_transcript_with_session(session_id: str, websocket: WebSocket, transcript: str, confidence: float) -> str:
-    """Process final speech recognition result using session context"""
+    """Process final speech recognition result using session context (the caller sends the response)"""
     try:
-        logger.info(f"🎤 [Session {session_id}] Final speech recognition: {transcript}")
+        logger.info("🎤 [Session %s] Final speech recognition: %s", session_id, transcript)
         
         # Update session status
         await conversation_manager.update_session_status(session_id, 'awaiting_ai')
@@ -824,38 +1213,19 @@ async def handle_final_transcript_with_session(session_id: str, websocket: WebSo
         # Get session context
         context = await conversation_manager.get_session_context(session_id)
         
-        # AI processing with context
-        if "email" in transcript.lower():
-            status_message = json.dumps({
-                "transcript": transcript,
-                "confidence": confidence,
-                "is_final": True,
-                "processing": True,
-                "status": "Analyzing your request and opening Gmail...",
-                "session_id": session_id,
-                "timestamp": datetime.now().isoformat()
-            })
-            await websocket.send_text(status_message)
-            logger.info(f"📧 [Session {session_id}] Gmail processing start notification sent")
-        
-        # Generate AI response based on session context
-        ai_response = await process_voice_command_with_context(session_id, transcript, context)
+        async def send_token(text: str):
+            await conversation_manager.send_to_session(session_id, _dump({
+                "type": "token",
+                "text": text,
+                "session_id": session_id
+            }))
+        
+        # Generate AI response based on session context (conversational replies stream as token frames)
+        ai_response = await process_voice_command_with_context(session_id, transcript, context, send_token)
         
         # Update session status
         await conversation_manager.update_session_status(session_id, 'ai_responding')
-
-        # Send final response
-        final_message = json.dumps({
-            "transcript": transcript,
-            "confidence": confidence,
-            "is_final": True,
-            "ai_response": ai_response,
-            "processing": False,
-            "session_id": session_id,
-            "timestamp": datetime.now().isoformat()
-        })
-        await websocket.send_text(final_message)
-        logger.info(f"✅ [Session {session_id}] Final response sent: {ai_response[:50]}...")
+        logger.info("✅ [Session %s] Final response ready: %.50s...", session_id, ai_response)
         
         # Enhanced Gmail task instruction with login detection
         task_instruction = f"""
@@ -875,41 +1245,38 @@ Be concise and efficient. If Gmail is already accessible, start the email task i
         return ai_response
         
     except Exception as e:
-        logger.error(f"[Session {session_id}] Final speech processing error: {str(e)}")
+        logger.error("[Session %s] Final speech processing error: %s", session_id, e)
         error_response = f"Sorry, there was an issue processing your command: {str(e)}"
-        
-        error_message = json.dumps({
-            "transcript": transcript,
-            "confidence": confidence,
-            "is_final": True,
-            "ai_response": error_response,
-            "processing": False,
-            "session_id": session_id,
-            "timestamp": datetime.now().isoformat()
-        })
-        await websocket.send_text(error_message)
-        
         return error_response
 
 # Context-based voice command processing function
-async def process_voice_command_with_context(session_id: str, transcript: str, context: Optional[ConversationContext]) -> str:
-    """Process voice command using session context"""
+async def process_voice_command_with_context(
+    session_id: str,
+    transcript: str,
+    context: Optional[ConversationContext],
+    on_token: Optional[Callable[[str], Awaitable[None]]] = None
+) -> str:
+    """Process voice command using session context (conversational replies are streamed to on_token)"""
     try:
-        if not llm_client:
+        if not await get_llm_client():
             return "Sorry, AI service is not initialized."
         
-        logger.info(f"🤖 [Session {session_id}] Context-based AI analysis: {transcript}")
+        logger.info("🤖 [Session %s] Context-based AI analysis: %s", session_id, transcript)
         
         # Generate prompt with context information
         context_info = ""
+        if context and context.summary_history:
+            context_info += "\n\nEarlier conversation summary:\n"
+            for summary_turn in context.summary_history:
+                context_info += f"{summary_turn.ai_response}\n"
         if context and context.turn_history:
-            recent_turns = context.turn_history[-3:]  # Use only recent 3 turns
-            context_info = "\n\nRecent conversation context:\n"
+            recent_turns = islice(context.turn_history, max(len(context.turn_history) - 3, 0), None)  # Use only recent 3 turns
+            context_info += "\n\nRecent conversation context:\n"
             for turn in recent_turns:
                 context_info += f"User: {turn.user_input}\nAssistant: {turn.ai_response}\n"
         
         # AI intent analysis (with context)
-        task_instruction = await analyze_user_intent_with_ai_and_context(transcript, context_info)
+        task_instruction = await analyze_user_intent_with_ai_and_context(transcript, context_info, on_token)
         
         # 간단한 인사
         if task_instruction == "SIMPLE_GREETING":
@@ -918,7 +1285,7 @@ async def process_voice_command_with_context(session_id: str, transcript: str, c
         # 브라우저 작업 필요
         elif task_instruction.startswith("BROWSER_ACTION:"):
             actual_task = task_instruction.replace("BROWSER_ACTION:", "").strip()
-            logger.info(f"🚀 [Session {session_id}] Browser-Use Agent execution: {actual_task[:50]}...")
+            logger.info("🚀 [Session %s] Browser-Use Agent execution: %.50s...", session_id, actual_task)
             
             # Session-based browser usage
             result = await run_browser_use_agent_with_session(session_id, actual_task)
@@ -929,436 +1296,327 @@ async def process_voice_command_with_context(session_id: str, transcript: str, c
             return task_instruction
             
     except Exception as e:
-        logger.error(f"[Session {session_id}] Context-based voice command processing error: {str(e)}")
+        logger.error("[Session %s] Context-based voice command processing error: %s", session_id, e)
         return f"Sorry, there was an issue processing your command: {str(e)}"
 
-# Final speech result processing and handler to respond to client
-async def handle_final_transcript(websocket: WebSocket, transcript: str, confidence: float):
-    """Process final speech recognition result and generate AI response"""
-    try:
-        logger.info(f"🎤 Final speech recognition: {transcript}")
-        
-        # AI processing start notification (additional notification if browser work is needed)
-        if "email" in transcript.lower():
-            status_message = json.dumps({
-                "transcript": transcript,
-                "confidence": confidence,
-                "is_final": True,
-                "processing": True,
-                "status": "Analyzing your request and opening Gmail...",
-                "timestamp": datetime.now().isoformat()
-            })
-            await websocket.send_text(status_message)
-            logger.info("📧 Gmail processing start notification sent")
-        
-        ai_response = await process_voice_command_async(transcript)
-
-        # Final response send
-        final_message = json.dumps({
-            "transcript": transcript,
-            "confidence": confidence,
-            "is_final": True,
-            "ai_response": ai_response,
-            "processing": False,
-            "timestamp": datetime.now().isoformat()
-        })
-        await websocket.send_text(final_message)
-        logger.info(f"✅ Final response sent completed: {ai_response[:50]}...")
-        
-        # Continuous conversation preparation notification (important!)
-        ready_message = json.dumps({
-            "type": "ready_for_next",
-            "status": "Ready for next command",
-            "timestamp": datetime.now().isoformat()
-        })
-        await websocket.send_text(ready_message)
-        logger.info("🔄 Continuous conversation preparation notification sent")
-        
-    except Exception as e:
-        logger.error(f"Final speech processing error: {str(e)}")
-        error_message = json.dumps({
-            "transcript": transcript,
-            "confidence": confidence,
-            "is_final": True,
-            "ai_response": f"Sorry, there was an issue processing your command: {str(e)}",
-            "processing": False,
-            "timestamp": datetime.now().isoformat()
-        })
-        await websocket.send_text(error_message)
-        
-        # Send continuous conversation preparation notification even if error occurs
-        try:
-            ready_message = json.dumps({
-                "type": "ready_for_next",
-                "status": "Ready for next command (after error)",
-                "timestamp": datetime.now().isoformat()
-            })
-            await websocket.send_text(ready_message)
-            logger.info("🔄 Error after continuous conversation preparation notification sent")
-        except Exception as ready_error:
-            logger.error(f"Continuous conversation preparation notification send failed: {str(ready_error)}")
-
-# Gmail automation processing based on Chrome Extension
-async def process_voice_command_async(transcript: str) -> str:
-    """Process speech command naturally by AI"""
+# Context-aware AI intent analysis function
+async def analyze_user_intent_with_ai_and_context(
+    transcript: str,
+    context_info: str,
+    on_token: Optional[Callable[[str], Awaitable[None]]] = None
+) -> str:
+    """Analyze user intent with conversation context, streaming conversational replies to on_token"""
     try:
-        if not llm_client:
-            return "Sorry, AI service is not initialized."
-        
-        logger.info(f"🤖 AI is analyzing speech command: {transcript}")
-        
-        # [1st step] Request AI to analyze user intent and convert it to Browser-Use Task
-        task_instruction = await analyze_user_intent_with_ai(transcript)
-        
-        # AI determined if it's just a greeting
-        if task_instruction == "SIMPLE_GREETING":
-            return "Hello! I'm here to help you manage your Gmail emails. What can I do for you?"
-        
-        # AI determined if browser work is needed
-        elif task_instruction.startswith("BROWSER_ACTION:"):
-            actual_task = task_instruction.replace("BROWSER_ACTION:", "").strip()
-            logger.info(f"🚀 Browser-Use Agent execution: {actual_task[:50]}...")
-            
-            # [2nd step] Execute Browser-Use Agent with generated Task
-            result = await run_browser_use_agent(actual_task)
-            
-            logger.info(f"✅ Browser-Use Agent work completed")
-            return result
-        
-        # AI generated if it's a general conversational response
-        else:
-            return task_instruction
+        local_decision = classify_intent_locally(transcript)
+        if local_decision is not None:
+            logger.info("⚡ Local intent match: %.50s...", local_decision)
+            return local_decision
         
-    except Exception as e:
-        logger.error(f"AI command processing error: {str(e)}")
-        return f"Sorry, there was an issue processing your command: {str(e)}"
-
-async def analyze_user_intent_with_ai(transcript: str) -> str:
-    """AI analyzes natural conversation and determines appropriate action"""
-    global last_ai_request_time
-    
-    try:
-        # Request frequency limitation (quota saving)
-        current_time = time.time()
-        if current_time - last_ai_request_time < AI_REQUEST_COOLDOWN:
-            logger.info(f"⏳ AI request cooldown... ({AI_REQUEST_COOLDOWN} seconds wait)")
-                    # Quick fallback response
-        if "email" in transcript.lower():
-            return f"BROWSER_ACTION: First check if Gmail is already open and logged in, if yes proceed directly to check emails in the inbox and provide a detailed summary, if not logged in navigate to Gmail and login first."
-        else:
-            return "Please wait a moment. Processing your request..."
+        llm = await get_llm_client()
+        if not llm:
+            return "Sorry, AI service is not available."
         
-        last_ai_request_time = current_time
+        # Repeated commands with the same context reuse the previous decision
+        cache_key = intent_cache_key(transcript, context_info)
+        cached = intent_cache.get(cache_key)
+        if cached is not None:
+            logger.info("⚡ Intent cache hit: %.50s...", cached)
+            return cached
         
-        # Grant role to LLM and let it determine action based on user's speech
-        prompt = f"""
-You are a helpful assistant guiding an AI agent to issue instructions to control Gmail.
-Listen to the user's next words and convert them into a clear and concise one-sentence instruction for the AI agent to perform a task on the browser.
-
-User: "{transcript}"
-
-Judgment rules:
-1. If the user's words are simple greetings ("hello", "hi") or unrelated conversation, respond with "SIMPLE_GREETING" only.
-2. If the user's words are related to checking, composing, or searching emails in Gmail, respond with "BROWSER_ACTION: [specific task instruction]" in the format.
-   - Example 1: "Check unread emails" -> "BROWSER_ACTION: First check if Gmail is already open and logged in, if yes proceed directly to check unread emails in the inbox and provide a detailed summary of senders and subjects, if not logged in navigate to Gmail and login."
-   - Example 2: "New email?" -> "BROWSER_ACTION: First check if Gmail is already open and logged in, if yes check for new emails in the inbox and count them, if not logged in navigate to Gmail and login first."
-   - Example 3: "Send email to Minjun" -> "BROWSER_ACTION: First check if Gmail is already open and logged in, if yes compose a new email to 'Minjun', if not logged in navigate to Gmail and login first."
-
-Important: 
-- Always start Gmail tasks by checking if Gmail is already accessible
-- For email checking tasks, you must instruct to provide the results (count, sender, subject, etc.)
-- If Gmail is already open and logged in, skip the login process completely
-
-Please make the most appropriate judgment.
-"""
+        # Context-aware prompt (llm_rate_limiter throttles the call by waiting for a token)
+        prompt = "".join((INTENT_PROMPT_INTRO, context_info, '\n\nCurrent User Request: "', transcript, CONTEXT_INTENT_PROMPT_TAIL))
 
-        # LangChain ChatGoogleGenerativeAI call pattern
-        from langchain.schema import HumanMessage
         messages = [HumanMessage(content=prompt)]
-        response = await llm_client.ainvoke(messages)
-        result = response.content.strip()
         
-        logger.info(f"🧠 AI intent analysis result: {result[:50]}...")
+        # Stream the completion; forward tokens only once the reply is known not to be a control decision
+        chunks = []
+        streaming = False
+        async for chunk in llm.astream(messages):
+            chunks.append(chunk.content)
+            if on_token is None:
+                continue
+            if streaming:
+                await on_token(chunk.content)
+                continue
+            head = "".join(chunks).lstrip()
+            if any(marker.startswith(head) or head.startswith(marker) for marker in INTENT_MARKERS):
+                continue
+            streaming = True
+            await on_token(head)
+        result = "".join(chunks).strip()
+        
+        logger.info("🧠 Context-aware AI intent analysis result: %.50s...", result)
+        intent_cache.set(cache_key, result)
         return result
         
     except Exception as e:
-        logger.error(f"AI intent analysis error: {str(e)}")
-        # Fallback: Process basic Gmail work
+        logger.error("Context-aware AI intent analysis error: %s", e)
         if "email" in transcript.lower():
             return f"BROWSER_ACTION: First check if Gmail is already open and logged in, if yes proceed directly to check emails in the inbox and provide a detailed summary, if not logged in navigate to Gmail and login first."
         else:
             return "Yes, how can I help you?"
 
-# Context-aware AI intent analysis function
-async def analyze_user_intent_with_ai_and_context(transcript: str, context_info: str) -> str:
-    """Analyze user intent with conversation context"""
-    global last_ai_request_time
-    
-    try:
-        if not llm_client:
-            return "Sorry, AI service is not available."
-        
-        current_time = time.time()
-        if current_time - last_ai_request_time < AI_REQUEST_COOLDOWN:
-            logger.info(f"⏳ AI request cooldown... ({AI_REQUEST_COOLDOWN} seconds wait)")
-            if "email" in transcript.lower():
-                return f"BROWSER_ACTION: First check if Gmail is already open and logged in, if yes proceed directly to check emails in the inbox and provide a detailed summary, if not logged in navigate to Gmail and login first."
-            else:
-                return "Please wait a moment. Processing your request..."
-        
-        last_ai_request_time = current_time
-        
-        # Context-aware prompt
-        prompt = f"""
-You are a helpful assistant guiding an AI agent to issue instructions to control Gmail.
-Listen to the user's next words and convert them into a clear and concise one-sentence instruction for the AI agent to perform a task on the browser.
+def build_session_browser(profile_dir: str) -> BrowserSession:
+    """Browser session for one conversation session (started by the caller)"""
+    browser_profile = BrowserProfile(
+        user_data_dir=profile_dir,
+        headless=False,
+        keep_alive=True,
+        args=SESSION_BROWSER_ARGS,
+        # Login exported by warm_up_profile.py; browser_use loads it into the new profile and merges refreshed cookies back
+        storage_state=STORAGE_STATE_PATH if os.path.exists(STORAGE_STATE_PATH) else None
+    )
+    return BrowserSession(browser_profile=browser_profile)
 
-{context_info}
+async def block_heavy_assets(context):
+    """Fail image/media/font requests in every page of a browser context.
+    
+    Uses CDP Fetch interception limited to those resource types instead of context.route(),
+    which would turn off the HTTP cache for the whole context (Gmail's JS/CSS bundles included).
+    """
+    if not BLOCK_HEAVY_ASSETS or context is None:
+        return
+    context.on("page", lambda page: _block_heavy_assets_on_page(context, page))
+    for page in context.pages:
+        await _block_heavy_assets_on_page(context, page)
 
-Current User Request: "{transcript}"
+async def _block_heavy_assets_on_page(context, page):
+    try:
+        cdp = await context.new_cdp_session(page)
+        cdp.on("Fetch.requestPaused", lambda event: cdp.send(
+            "Fetch.failRequest", {"requestId": event["requestId"], "errorReason": "BlockedByClient"}
+        ))
+        await cdp.send("Fetch.enable", {
+            "patterns": [{"resourceType": resource_type, "requestStage": "Request"} for resource_type in HEAVY_RESOURCE_TYPES]
+        })
+    except Exception as e:
+        logger.debug("Asset blocking not applied to page: %s", e)
 
-Judgment rules:
-1. If the user's words are simple greetings ("hello", "hi") or unrelated conversation, respond with "SIMPLE_GREETING" only.
-2. If the user's words are related to checking, composing, or searching emails in Gmail, respond with "BROWSER_ACTION: [specific task instruction]" in the format.
-   - Example 1: "Check unread emails" -> "BROWSER_ACTION: First check if Gmail is already open and logged in, if yes proceed directly to check unread emails in the inbox and provide a detailed summary of senders and subjects, if not logged in navigate to Gmail and login."
-   - Example 2: "New email?" -> "BROWSER_ACTION: First check if Gmail is already open and logged in, if yes check for new emails in the inbox and count them, if not logged in navigate to Gmail and login first."
-   - Example 3: "Send email to Minjun" -> "BROWSER_ACTION: First check if Gmail is already open and logged in, if yes compose a new email to 'Minjun', if not logged in navigate to Gmail and login first."
+async def fill_browser_pool():
+    """Start browsers until the warm pool is full, so a session's first command skips the browser launch"""
+    async with browser_pool_lock:
+        while not browser_pool.full():
+            profile_dir = os.path.join(os.getcwd(), f"browser_profile_pool_{uuid.uuid4().hex[:8]}")
+            browser_session = build_session_browser(profile_dir)
+            try:
+                await browser_session.start()
+                await block_heavy_assets(browser_session.browser_context)
+                if WARM_UP_ON_STARTUP:
+                    await warm_pooled_browser(browser_session)
+            except Exception as e:
+                logger.error("❌ Browser pre-warm failed: %s", e)
+                try:
+                    await browser_session.kill()  # May have started before failing; never delete a profile in use
+                except Exception:
+                    pass
+                await asyncio.to_thread(shutil.rmtree, profile_dir, ignore_errors=True)
+                return
+            browser_pool.put_nowait(browser_session)
+            logger.info("🔥 Pre-warmed browser added to pool (%s/%s)", browser_pool.qsize(), BROWSER_POOL_SIZE)
 
-Consider the conversation context when making your judgment. If the user is following up on a previous request or asking for clarification, adapt the instruction accordingly.
+async def drain_browser_pool():
+    """Kill pre-warmed browsers that were never handed out"""
+    while not browser_pool.empty():
+        browser_session = browser_pool.get_nowait()
+        try:
+            await browser_session.kill()
+        except Exception as e:
+            logger.error("❌ Pooled browser cleanup failed: %s", e)
+        await asyncio.to_thread(shutil.rmtree, browser_session.browser_profile.user_data_dir, ignore_errors=True)
 
-Please make the most appropriate judgment.
-"""
+def agent_is_reusable(agent: Agent) -> bool:
+    """Whether a session agent's accumulated prompt and step history are still small enough to extend"""
+    return (
+        agent.state.message_manager_state.history.current_tokens < AGENT_MAX_PROMPT_TOKENS
+        and len(agent.state.history.history) < AGENT_MAX_HISTORY_STEPS
+    )
 
-        from langchain.schema import HumanMessage
-        messages = [HumanMessage(content=prompt)]
-        response = await llm_client.ainvoke(messages)
-        result = response.content.strip()
-        
-        logger.info(f"🧠 Context-aware AI intent analysis result: {result[:50]}...")
-        return result
-        
-    except Exception as e:
-        logger.error(f"Context-aware AI intent analysis error: {str(e)}")
-        if "email" in transcript.lower():
-            return f"BROWSER_ACTION: First check if Gmail is already open and logged in, if yes proceed directly to check emails in the inbox and provide a detailed summary, if not logged in navigate to Gmail and login first."
-        else:
-            return "Yes, how can I help you?"
+async def run_agent_task(agent: Agent, max_steps: int = 10) -> AgentHistoryList:
+    """Run the agent's current task and return only the history produced by this run"""
+    # add_new_task() keeps the run-control state; a previous failed or stopped run
+    # would otherwise make Agent.run exit before its first step on every later command
+    agent.state.consecutive_failures = 0
+    agent.state.stopped = False
+    history_start = len(agent.state.history.history)
+    history = await agent.run(max_steps=max_steps)
+    return AgentHistoryList(history=history.history[history_start:])
 
 # Session-based browser agent execution function
 async def run_browser_use_agent_with_session(session_id: str, task_instruction: str) -> str:
     """Execute Browser-Use Agent with session management"""
     try:
-        from browser_use import Agent
-        from browser_use.browser import BrowserSession, BrowserProfile
-        import os
+        cache_key = skill_cache_key(task_instruction)
+        cached = skill_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            logger.info("⚡ [Session %s] Agent result cache hit: %.50s...", session_id, task_instruction)
+            return cached
         
         # Session-specific profile directory
-        profile_dir = os.path.join(os.getcwd(), f"browser_profile_{session_id}")
+        profile_dir = conversation_manager.browser_profile_dir(session_id)
         
         # Get or create session-specific browser
-        browser_session = conversation_manager.get_or_create_browser_session(session_id)
+        browser_session = await conversation_manager.get_or_create_browser_session(session_id)
         
         if browser_session is None:
-            logger.info(f"🚀 [Session {session_id}] Create new browser session - Profile: {profile_dir}")
-            
-            browser_profile = BrowserProfile(
-                user_data_dir=profile_dir,
-                headless=False,
-                keep_alive=True,
-                args=[
-                    "--no-first-run",
-                    "--no-default-browser-check",
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-web-security",  # Allow cross-origin requests
-                    "--disable-features=VizDisplayCompositor"  # Improve stability
-                ]
-            )
-            
-            browser_session = BrowserSession(browser_profile=browser_profile)
-            await browser_session.start()
+            if not browser_pool.empty():
+                browser_session = browser_pool.get_nowait()
+                logger.info("🔥 [Session %s] Use pre-warmed browser - Profile: %s", session_id, browser_session.browser_profile.user_data_dir)
+                # Top the pool back up in the background
+                task = asyncio.create_task(fill_browser_pool())
+                browser_pool_tasks.add(task)
+                task.add_done_callback(browser_pool_tasks.discard)
+            else:
+                logger.info("🚀 [Session %s] Create new browser session - Profile: %s", session_id, profile_dir)
+                browser_session = build_session_browser(profile_dir)
+                await browser_session.start()
+                await block_heavy_assets(browser_session.browser_context)
             
             # Save to session manager
             conversation_manager.browser_sessions[session_id] = browser_session
         else:
-            logger.info(f"🔄 [Session {session_id}] Reuse existing browser session")
-        
-        # Create and run Agent
-        agent = Agent(
-            task=task_instruction,
-            llm=llm_client,
-            browser_session=browser_session
-        )
+            logger.info("🔄 [Session %s] Reuse existing browser session", session_id)
+        
+        # Reuse the session's Agent for follow-up commands until its context grows too large
+        agent = conversation_manager.session_agents.get(session_id)
+        if agent is None or not agent_is_reusable(agent):
+            agent = Agent(
+                task=task_instruction,
+                llm=await get_llm_client(),
+                browser_session=browser_session
+            )
+            conversation_manager.session_agents[session_id] = agent
+        else:
+            agent.add_new_task(task_instruction)
         
-        logger.info(f"🎯 [Session {session_id}] Agent task execution: {task_instruction[:50]}...")
-        result = await agent.run(max_steps=10)
-        logger.info(f"✅ [Session {session_id}] Agent execution completed - Browser session kept alive for continuous conversation")
+        logger.info("🎯 [Session %s] Agent task execution: %.50s...", session_id, task_instruction)
+        async with agent_semaphore:
+            try:
+                result = await asyncio.wait_for(run_agent_task(agent), timeout=AGENT_RUN_TIMEOUT)
+            except asyncio.TimeoutError:
+                # Cancelled mid-step, so its message history may be inconsistent; the next command gets a fresh agent
+                conversation_manager.session_agents.pop(session_id, None)
+                logger.warning("⏱️ [Session %s] Agent run timed out after %gs", session_id, AGENT_RUN_TIMEOUT)
+                return "Sorry, that took too long. The browser session is still available for your next command."
+        logger.info("✅ [Session %s] Agent execution completed - Browser session kept alive for continuous conversation", session_id)
         
         # IMPORTANT: Do NOT cleanup browser session here - keep it alive for next command
         # The browser window should remain open for continuous Gmail interactions
         
         # Return result
-        return await extract_agent_result(result)
+        agent_result = await extract_agent_result(result)
+        if cache_key:
+            skill_cache.set(cache_key, agent_result)
+        return agent_result
                 
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"[Session {session_id}] Browser-Use Agent execution error: {error_msg}")
         
         # Browser profile collision error handling
-        if "browser_pid" in error_msg and "already running" in error_msg:
-            logger.warning("🔄 Browser profile collision detected - Clean existing session and retry")
+        if COLLISION_RE.search(error_msg):
+            logger.warning("🔄 [Session %s] Browser profile collision detected - Clean existing session and retry", session_id)
             await conversation_manager.cleanup_session(session_id)
             return "I'm setting up a fresh browser session for you. Please try your request again in a moment."
         
+        logger.error("[Session %s] Browser-Use Agent execution error: %s", session_id, error_msg)
+        
         # General error handling - DO NOT cleanup browser session to keep it alive
-        logger.warning(f"⚠️ Agent execution failed but keeping browser session alive: {error_msg}")
+        logger.warning("⚠️ Agent execution failed but keeping browser session alive: %s", error_msg)
         return f"Sorry, there was an issue processing your request. The browser session is still available for your next command."
 
-async def run_browser_use_agent(task_instruction: str) -> str:
-    """[Modified] Reuse Browser-Use Agent to support continuous conversation"""
-    global global_browser_session, global_agent
-    
+async def warm_agent_path():
+    """Let browser_use verify the shared LLM once, ahead of the first session agent"""
+    llm = await get_llm_client()
+    if llm is not None:
+        try:
+            # Agent() checks the API key / tool-calling method with a blocking LLM call and caches the result on llm_client
+            await asyncio.to_thread(Agent, task="Open the Gmail inbox", llm=llm)
+            logger.info("🔥 LLM connection verified for Browser-Use Agent")
+        except Exception as e:
+            logger.warning("⚠️ LLM warm-up failed: %s", e)
+
+async def warm_pooled_browser(browser_session: BrowserSession):
+    """Open the Gmail inbox in a pooled session browser so its first command starts on a loaded page"""
     try:
-        from browser_use import Agent
-        from browser_use.browser import BrowserSession, BrowserProfile
-        import os
-        
-        # Profile folder to store login information
-        profile_dir = os.path.join(os.getcwd(), "browser_profile")
-        
-        # Check if existing session is active
-        if global_browser_session and global_agent:
-            try:
-                # Check if existing session is alive
-                if hasattr(global_browser_session, 'browser') and global_browser_session.browser:
-                    logger.info(f"🔄 Reuse existing browser session - New task: {task_instruction[:50]}...")
-                    logger.info("💬 Continuous conversation mode: Use existing session without opening new browser window")
-                    
-                    # Create new Agent with existing browser session
-                    new_agent = Agent(
-                        task=task_instruction,
-                        llm=llm_client,
-                        browser_session=global_browser_session
-                    )
-                    
-                    # Agent execution
-                    logger.info("🎯 Agent task execution: " + task_instruction[:50] + "...")
-                    result = await new_agent.run(max_steps=10)
-                    logger.info(f"✅ Continuous conversation Agent execution completed")
-                    
-                    # Return result
-                    return await extract_agent_result(result)
-                    
-            except Exception as reuse_error:
-                logger.warning(f"⚠️ Existing session reuse failed: {str(reuse_error)}")
-                logger.info("🔄 Switch to new browser session...")
-                # Clean existing session
-                await cleanup_browser_session()
-        
-        # Create new session
-        logger.info(f"🚀 Start new Browser-Use Agent - Profile: {profile_dir}")
-        
-        # [Core] Use permanent profile to set up browser
-        browser_profile = BrowserProfile(
-            user_data_dir=profile_dir,
-            headless=False,  # False is more convenient for debugging
-            keep_alive=True,  # Browser session maintenance
-            args=[
-                "--no-first-run",
-                "--no-default-browser-check",
-                "--disable-blink-features=AutomationControlled",
-                "--disable-web-security",  # Allow cross-origin requests
-                "--disable-features=VizDisplayCompositor"  # Improve stability
-            ]
-        )
-        
-        # BrowserSession creation
-        global_browser_session = BrowserSession(browser_profile=browser_profile)
-        
-        # Start session if keep_alive=True
-        await global_browser_session.start()
-        
-        # Agent creation with browser_session
-        global_agent = Agent(
-            task=task_instruction,
-            llm=llm_client,
-            browser_session=global_browser_session
-        )
-        
-        logger.info(f"🎯 Agent task execution: {task_instruction[:50]}...")
-        
-        # Agent execution (step-limited for API quota management)
-        # IMPORTANT: Do not close browser after task completion for continuous conversation
-        result = await global_agent.run(max_steps=10)
-        
-        logger.info(f"✅ Agent execution completed - Browser session kept alive for continuous conversation")
-        
-        # IMPORTANT: Do NOT cleanup browser session here - keep it alive for next command
-        # The browser window should remain open for continuous Gmail interactions
-        
-        # Return result
-        return await extract_agent_result(result)
-                
+        page = await browser_session.get_current_page()
+        await page.goto(GMAIL_INBOX_URL, wait_until="load", timeout=30000)  # Gmail's long-polls never reach networkidle
+        logger.info("🔥 Gmail inbox pre-loaded in pooled browser")
     except Exception as e:
-        error_msg = str(e)
-        logger.error(f"Browser-Use Agent execution error: {error_msg}")
-        
-        # Browser profile collision error handling
-        if "browser_pid" in error_msg and "already running" in error_msg:
-            logger.warning("🔄 Browser profile collision detected - Clean existing session and retry")
-            await cleanup_browser_session()
-            return "I'm setting up a fresh browser session for you. Please try your request again in a moment."
-        
-        # General error handling - DO NOT cleanup browser session to keep it alive
-        logger.warning(f"⚠️ Agent execution failed but keeping browser session alive: {error_msg}")
-        return f"Sorry, there was an issue processing your request. The browser session is still available for your next command."
+        logger.warning("⚠️ Gmail warm-up failed: %s", e)
 
 async def extract_agent_result(result) -> str:
     """Extract meaningful information from Agent execution result (improved)"""
     try:
-        logger.info(f"🔍 Agent result extraction start - Result type: {type(result)}")
+        logger.info("🔍 Agent result extraction start - Result type: %s", type(result))
+        
+        # Look each attribute up once; getattr on None/odd results just yields the default
+        final_fn = getattr(result, 'final_result', None)
+        history = getattr(result, 'history', None)
         
         # 1. Check if final_result() method exists
-        if result and hasattr(result, 'final_result'):
+        if final_fn:
             try:
-                final_result = result.final_result()
-                if final_result and str(final_result).strip():
-                    logger.info(f"✅ final_result found: {final_result}")
-                    return str(final_result)
+                final_result = final_fn()
+                if final_result and not isinstance(final_result, str):
+                    # Non-string results may be nested models with an expensive __str__; keep it off the event loop
+                    final_result = await asyncio.to_thread(str, final_result)
+                # isspace() bails on the first non-space; only strip when the ends actually need it
+                if final_result and not final_result.isspace():
+                    if final_result[0].isspace() or final_result[-1].isspace():
+                        final_result = final_result.strip()
+                    logger.info("✅ final_result found: %s", final_result)
+                    return final_result
             except Exception as e:
-                logger.warning(f"final_result extraction failed: {str(e)}")
+                logger.warning("final_result extraction failed: %s", e)
         
         # 2. Find extracted_content from history (most important part)
-        if result and hasattr(result, 'history'):
-            logger.info(f"📋 History item count: {len(result.history)}")
+        if history is not None:
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            if debug_enabled:
+                logger.debug("📋 History item count: %d", len(history))
+            
+            # The finished answer is almost always in the last steps: take the most recent extraction there
+            tail_start = max(len(history) - HISTORY_TAIL_ITEMS, 0)
+            for history_item in reversed(history[tail_start:]):
+                for action_result in reversed(getattr(history_item, 'result', None) or ()):
+                    extracted_content = getattr(action_result, 'extracted_content', None)
+                    content = extracted_content.strip() if extracted_content else ""
+                    if content:
+                        logger.info("🎯 Final selected result: %.100s...", content)
+                        return content
             
-            # Collect all extracted_content
-            extracted_contents = []
+            # Nothing in the tail: track the longest (most specific) extracted_content over the earlier steps
+            best_result = ""
+            seen_contents = set()
             
-            for i, history_item in enumerate(result.history):
-                logger.info(f"📝 History {i}: {type(history_item)}")
+            for i, history_item in enumerate(history[:tail_start]):
+                if debug_enabled:
+                    logger.debug("📝 History %d: %s", i, type(history_item))
                 
-                if hasattr(history_item, 'result') and history_item.result:
-                    for j, action_result in enumerate(history_item.result):
-                        logger.info(f"    Action {j}: extracted_content={hasattr(action_result, 'extracted_content')}")
-                        
-                        if hasattr(action_result, 'extracted_content') and action_result.extracted_content:
-                            content = action_result.extracted_content.strip()
-                            if content and content not in extracted_contents:
-                                extracted_contents.append(content)
-                                logger.info(f"   ✅ Content found: {content[:100]}...")
+                for j, action_result in enumerate(getattr(history_item, 'result', None) or ()):
+                    extracted_content = getattr(action_result, 'extracted_content', None)
+                    if debug_enabled:
+                        logger.debug("    Action %d: extracted_content=%s", j, extracted_content is not None)
+                    
+                    if extracted_content:
+                        content = extracted_content.strip()
+                        if content and content not in seen_contents:
+                            seen_contents.add(content)
+                            if debug_enabled:
+                                logger.debug("   ✅ Content found: %s...", content[:100])
+                            if len(content) > len(best_result):
+                                best_result = content
             
             # Return most useful result
-            if extracted_contents:
-                # Select the longest and most specific result (usually the last result is the most completed form)
-                best_result = max(extracted_contents, key=len)
-                logger.info(f"🎯 Final selected result: {best_result[:100]}...")
+            if best_result:
+                logger.info("🎯 Final selected result: %.100s...", best_result)
                 return best_result
         
-        # 3. Direct string conversion attempt
-        if result:
-            result_str = str(result).strip()
+        # 3. Direct string conversion attempt (not for agent histories: an empty one would echo its repr to the user)
+        if result and history is None:
+            # AgentHistoryList.__str__ renders the whole trajectory, so stringify it in a worker thread
+            result_str = (await asyncio.to_thread(str, result)).strip()
             if result_str and result_str != "None":
-                logger.info(f"📄 Direct string conversion result: {result_str[:100]}...")
+                logger.info("📄 Direct string conversion result: %.100s...", result_str)
                 return result_str
         
         # 4. Fallback message
@@ -1366,24 +1624,13 @@ async def extract_agent_result(result) -> str:
         return "✅ Gmail work completed. Please check the result in the browser."
         
     except Exception as e:
-        logger.error(f"❌ Error occurred during result extraction: {str(e)}")
+        logger.error("❌ Error occurred during result extraction: %s", e)
         return "✅ Gmail work completed."
 
 async def cleanup_browser_session():
-    """Clean browser session"""
-    global global_browser_session, global_agent
-    
-    try:
-        if global_browser_session:
-            # Browser session end (keep_alive=True, so kill() is used)
-            if hasattr(global_browser_session, 'kill'):
-                await global_browser_session.kill()
-            logger.info("🧹 Browser session cleaned")
-    except Exception as e:
-        logger.error(f"Browser session cleanup error: {str(e)}")
-    finally:
-        global_browser_session = None
-        global_agent = None
+    """Close every session browser (keep_alive browsers would otherwise outlive the server)"""
+    for session_id in list(conversation_manager.browser_sessions):
+        await conversation_manager.close_browser_session(session_id)
 
 # Browser session cleanup when server ends
 @app.on_event("shutdown")
@@ -1391,6 +1638,20 @@ async def shutdown_event():
     """Clean browser session when server ends"""
     logger.info("🛑 Server end in progress - Browser session cleanup")
     await cleanup_browser_session()
+    await drain_browser_pool()
+    log_listener.stop()
 
 if __name__ == "__main__":
-    uvicorn.run("server:app", host="127.0.0.1", port=8000, reload=True) 
\ No newline at end of file
+    uvicorn.run(
+        "server:app",
+        host="127.0.0.1",
+        port=8000,
+        reload=os.getenv('SERVER_RELOAD', '').lower() in ('1', 'true'),  # Dev only: a reload drops in-memory sessions and orphans their browsers
+        loop="uvloop" if sys.platform != "win32" else "asyncio",  # uvloop is not available on Windows
+        http="httptools",
+        ws="websockets",
+        ws_ping_interval=20,  # Protocol-level ping frames detect dead peers
+        ws_ping_timeout=20,
+        ws_max_size=WS_MAX_MESSAGE_SIZE,
+        ws_per_message_deflate=False  # Opus audio does not compress; deflate only costs CPU and copies per frame
+    )
@@ -0,0 +1,238 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('fastapi')
+
+from browser_use import server
+from browser_use.agent.views import ActionResult, AgentHistory, AgentState
+from browser_use.browser.views import BrowserStateHistory
+
+
+def make_history_item(content):
+    return AgentHistory(
+        model_output=None,
+        result=[ActionResult(extracted_content=content, include_in_memory=True)],
+        state=BrowserStateHistory(url='', title='', tabs=[], interacted_element=[], screenshot=None),
+    )
+
+
+class FakeAgent:
+    """Mimics Agent.run's loop guards: a failed-out or stopped agent returns without running a step"""
+
+    max_failures = 3
+
+    def __init__(self):
+        self.state = AgentState()
+        self.fail_next_run = False
+
+    async def run(self, max_steps=10):
+        if self.state.consecutive_failures >= self.max_failures or self.state.stopped:
+            return self.state.history
+        if self.fail_next_run:
+            self.state.consecutive_failures = self.max_failures
+            self.state.stopped = True
+            return self.state.history
+        self.state.history.history.append(make_history_item(f'result {len(self.state.history.history)}'))
+        return self.state.history
+
+
+def test_reused_agent_runs_after_failed_run():
+    agent = FakeAgent()
+    agent.fail_next_run = True
+    failed = asyncio.run(server.run_agent_task(agent))
+    assert failed.history == []
+
+    agent.fail_next_run = False
+    result = asyncio.run(server.run_agent_task(agent))
+    assert len(result.history) == 1
+    assert asyncio.run(server.extract_agent_result(result)) == 'result 0'
+
+
+def test_empty_agent_history_is_not_echoed():
+    agent = FakeAgent()
+    agent.fail_next_run = True
+    result = asyncio.run(server.run_agent_task(agent))
+    assert 'AgentHistoryList' not in asyncio.run(server.extract_agent_result(result))
+
+
+def test_every_turn_is_kept_in_history_or_summary(monkeypatch):
+    async def no_llm():
+        return None
+
+    monkeypatch.setattr(server, 'get_llm_client', no_llm)
+
+    async def scenario():
+        manager = server.ContinuousConversationManager()
+        manager.active_sessions['s'] = server.ConversationState(
+            session_id='s', status='idle', context=server.ConversationContext(), websocket_connected=True
+        )
+        for i in range(45):
+            await manager.add_conversation_turn('s', f'turn-{i}', 'ok')
+        await asyncio.gather(*manager._background_tasks)
+        return manager.active_sessions['s'].context
+
+    context = asyncio.run(scenario())
+    kept = {turn.user_input for turn in context.turn_history}
+    summarized = {name for turn in context.summary_history for name in turn.ai_response.split('; ')}
+    for i in range(45):
+        assert f'turn-{i}' in kept or f'turn-{i}' in summarized
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.client_state = server.WebSocketState.CONNECTED
+        self.close_codes = []
+        self.sent = []
+
+    async def close(self, code=1000, reason=None):
+        self.close_codes.append(code)
+        self.client_state = server.WebSocketState.DISCONNECTED
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+def test_evicting_at_session_cap_keeps_new_websocket(monkeypatch, tmp_path):
+    monkeypatch.setattr(server, 'MAX_ACTIVE_SESSIONS', 2)
+    monkeypatch.setattr(server.ContinuousConversationManager, 'browser_profile_dir', staticmethod(lambda sid: str(tmp_path / sid)))
+
+    async def scenario():
+        manager = server.ContinuousConversationManager()
+        old_websockets = [FakeWebSocket(), FakeWebSocket()]
+        old_ids = [await manager.create_session(ws) for ws in old_websockets]
+        websocket = FakeWebSocket()
+        new_id = await manager.create_session(websocket)
+        await manager.send_to_session(new_id, b'hello')
+        for _ in range(3):
+            await asyncio.sleep(0)
+        writers = list(manager.session_writers.values())
+        for writer in writers:
+            writer.cancel()
+        await asyncio.gather(*writers, return_exceptions=True)
+        return manager, old_ids, old_websockets, new_id, websocket
+
+    manager, old_ids, old_websockets, new_id, websocket = asyncio.run(scenario())
+    assert manager.session_websockets[new_id] is websocket
+    assert old_ids[0] not in manager.active_sessions
+    assert old_websockets[0].close_codes == [1013]
+    assert websocket.close_codes == []
+    assert websocket.sent == [b'hello']
+
+
+def test_session_agent_is_rebuilt_once_its_context_grows(monkeypatch):
+    monkeypatch.setattr(server, 'AGENT_MAX_PROMPT_TOKENS', 1000)
+    monkeypatch.setattr(server, 'AGENT_MAX_HISTORY_STEPS', 3)
+    agent = FakeAgent()
+    assert server.agent_is_reusable(agent)
+
+    agent.state.message_manager_state.history.current_tokens = 1000
+    assert not server.agent_is_reusable(agent)
+
+    agent.state.message_manager_state.history.current_tokens = 0
+    for _ in range(3):
+        asyncio.run(server.run_agent_task(agent))
+    assert not server.agent_is_reusable(agent)
+
+
+@pytest.mark.parametrize('task, cacheable', [
+    ('Check my inbox for unread emails', True),
+    ('Summarize the latest email from Bob', True),
+    ('How many unread emails do I have', True),
+    ('Search for emails about the invoice', True),
+    ('Read the newest email', True),
+    ('Open the first email', False),
+    ('Send a reply to John', False),
+    ('Delete the email from Amazon', False),
+    ('Star the email from Alice', False),
+    ('Snooze the newsletter until tomorrow', False),
+    ('Report the last email as spam', False),
+    ('Unsubscribe from this mailing list', False),
+    ('Mute this thread', False),
+    ('Block the sender of the last email', False),
+    ('Check the inbox and archive the newsletters', False),
+])
+def test_only_read_tasks_are_cached(task, cacheable):
+    assert (server.skill_cache_key(task) is not None) is cacheable
+
+
+@pytest.mark.parametrize('transcript, decision', [
+    ('Hello!', 'SIMPLE_GREETING'),
+    ('good morning', 'SIMPLE_GREETING'),
+    ('Check my unread emails.', 'BROWSER_ACTION'),
+    ('Do I have any new emails?', 'BROWSER_ACTION'),
+    ('Hello, send an email to Minjun', None),
+    ('Check unread emails from Bob', None),
+])
+def test_classify_intent_locally(transcript, decision):
+    result = server.classify_intent_locally(transcript)
+    if decision is None:
+        assert result is None
+    else:
+        assert result.startswith(decision)
+
+
+def test_audio_ring_drops_oldest_and_closes_after_buffered_chunks():
+    async def scenario():
+        ring = server.AudioRing(capacity=2)
+        accepted = [ring.push_nowait(b'a'), ring.push_nowait(b'b'), ring.push_nowait(b'c')]
+        ring.close()
+        received = [await ring.get() for _ in range(3)]
+        return ring, accepted, received
+
+    ring, accepted, received = asyncio.run(scenario())
+    assert accepted == [True, True, False]
+    assert ring.dropped == 1
+    assert received == [b'b', b'c', None]
+
+
+def test_response_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(server.time, 'monotonic', lambda: now[0])
+    cache = server.ResponseCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+
+    now[0] = 11.0
+    assert cache.get('a') is None
+    assert cache.get('c') is None
+
+
+class FakeChunk:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeStreamingLLM:
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+    async def astream(self, messages):
+        for piece in self.pieces:
+            yield FakeChunk(piece)
+
+
+@pytest.mark.parametrize('pieces, streamed', [
+    (['BROWSER', '_ACT', 'ION: open the inbox'], []),
+    (['SIMPLE', '_GREETING'], []),
+    (['Sure', ', I can', ' help.'], ['Sure', ', I can', ' help.']),
+    ([' SIM', 'ilar question?'], ['SIMilar question?']),
+])
+def test_intent_markers_are_held_back_from_token_stream(monkeypatch, pieces, streamed):
+    async def fake_llm():
+        return FakeStreamingLLM(pieces)
+
+    monkeypatch.setattr(server, 'get_llm_client', fake_llm)
+    monkeypatch.setattr(server, 'intent_cache', server.ResponseCache(maxsize=8, ttl=60))
+    tokens = []
+
+    async def on_token(text):
+        tokens.append(text)
+
+    result = asyncio.run(server.analyze_user_intent_with_ai_and_context('what about the second one', '', on_token))
+    assert result == ''.join(pieces).strip()
+    assert tokens == streamed
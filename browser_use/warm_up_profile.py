@@ -3,13 +3,13 @@
 Profile warm-up script to maintain Gmail login status
 
 Run this script once to manually log in to Gmail,
-then the login information will be saved in the browser profile
-for the AI agent to use later.
+then the login cookies/localStorage will be exported to
+browser_profile/state.json for the AI agent to use later.
 
 Usage:
 1. Run python warm_up_profile.py
 2. Log in to Gmail in the opened browser (all methods including passkey, 2FA available)
-3. Exit script after login completion
+3. The script detects the loaded inbox and exits automatically
 4. AI agent will then use this login status
 """
 
@@ -22,6 +22,10 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Gmail inbox toolbar; appears only once the user is logged in
+INBOX_SELECTOR = 'div[role="main"] [gh="tl"]'
+LOGIN_TIMEOUT_MS = 5 * 60 * 1000
+
 async def warm_up_gmail_profile():
     """Warm up Gmail profile to save login status"""
     
@@ -32,10 +36,11 @@ async def warm_up_gmail_profile():
     logger.info("📋 This script is for saving Gmail login status.")
     logger.info("🔐 Please log in to Gmail in the opened browser (all methods including passkey, 2FA available)")
     
+    os.makedirs(profile_dir, exist_ok=True)
+    
     async with async_playwright() as p:
-        # Launch browser (specify profile directory)
-        browser = await p.chromium.launch_persistent_context(
-            user_data_dir=profile_dir,
+        # Launch a non-persistent browser: no user-data-dir lock, only state.json is kept
+        browser = await p.chromium.launch(
             headless=False,  # Show browser for user to log in directly
             args=[
                 '--no-first-run',
@@ -43,9 +48,10 @@ async def warm_up_gmail_profile():
                 '--disable-blink-features=AutomationControlled'
             ]
         )
+        context = await browser.new_context(no_viewport=True)
         
         # Create new page
-        page = await browser.new_page()
+        page = await context.new_page()
         
         try:
             # Access Gmail
@@ -54,17 +60,17 @@ async def warm_up_gmail_profile():
             
             logger.info("✋ Please log in to Gmail in the browser!")
             logger.info("🔑 Use any method: passkey, 2-factor authentication, password, etc.")
-            logger.info("✅ Press Enter after login completion...")
-            
-            # Wait for user input
-            input("Press Enter after login completion...")
+            logger.info(f"⏳ Waiting up to {LOGIN_TIMEOUT_MS // 60000} minutes for the inbox to load...")
             
             # Check login status
             try:
-                # Check if Gmail interface is loaded
-                await page.wait_for_selector('[role="main"]', timeout=10000)
+                # Resolves as soon as Gmail's inbox toolbar renders; raises on timeout or if the window is closed
+                await page.wait_for_selector(INBOX_SELECTOR, timeout=LOGIN_TIMEOUT_MS)
+                # Export cookies/localStorage so the server can hydrate fresh browser contexts from them
+                storage_state_path = os.path.join(profile_dir, "state.json")
+                await context.storage_state(path=storage_state_path)
                 logger.info("✅ Gmail login status successfully saved!")
-                logger.info(f"📁 Profile location: {profile_dir}")
+                logger.info(f"🍪 Storage state saved: {storage_state_path}")
                 logger.info("🤖 AI agent can now use this login status.")
                 
             except Exception as e:
@@ -86,13 +92,13 @@ def main():
     print()
     print("Purpose of this script:")
     print("1. Manually log in to Gmail once")
-    print("2. Save login status to browser profile")
+    print("2. Save login status to browser_profile/state.json")
     print("3. AI agent will use this login status later")
     print()
     print("Notes:")
     print("- Supports all login methods including passkey, 2-factor authentication")
-    print("- Please press Enter after login")
-    print("- Profile will be saved in browser_profile/ folder")
+    print("- Login is detected automatically once the inbox loads")
+    print("- Login state will be saved to browser_profile/state.json")
     print()
     
     try:
@@ -27,6 +27,8 @@ let silenceTimeout: NodeJS.Timeout | null = null
 let accumulatedTranscript = ""
 let reconnectAttempts = 0
 const MAX_RECONNECT_ATTEMPTS = 5
+const textDecoder = new TextDecoder() // Server sends JSON messages as binary frames
+let streamedResponse = '' // Accumulates token frames for the current command
 
 // WebSocket connection setup
 function setupWebSocket() {
@@ -41,6 +43,7 @@ function setupWebSocket() {
 
   console.log('🔌 WebSocket connection attempt...', reconnectAttempts + 1);
   ws = new WebSocket('ws://localhost:8000/ws/speech');
+  ws.binaryType = 'arraybuffer';
   
   ws.onopen = () => {
     console.log('🔌 WebSocket connected');
@@ -81,165 +84,195 @@ function setupWebSocket() {
   
   ws.onmessage = (event) => {
     try {
-      const result = JSON.parse(event.data);
-      
-      if (result.error) {
-        console.error('🚨 Speech recognition error:', result.error);
-        chrome.runtime.sendMessage({ 
-          type: 'VOICE_RECOGNITION_ERROR', 
-          error: result.error 
-        });
-        return;
+      const payload = typeof event.data === 'string' ? event.data : textDecoder.decode(event.data);
+      // The server coalesces queued messages into one frame as newline-delimited JSON
+      for (const line of payload.split('\n')) {
+        handleServerMessage(JSON.parse(line));
       }
+    } catch (error) {
+      console.error('🚨 WebSocket message processing error:', error);
+    }
+  };
+}
+
+// Handle one JSON message from the server (frames may carry several, newline-delimited)
+function handleServerMessage(result: any) {
+  if (result.error) {
+    console.error('🚨 Speech recognition error:', result.error);
+    chrome.runtime.sendMessage({ 
+      type: 'VOICE_RECOGNITION_ERROR', 
+      error: result.error 
+    });
+    return;
+  }
+  
+  // Streamed AI reply tokens for the current command
+  if (result.type === 'token') {
+    streamedResponse += result.text
+    showNotification(`🤖 ${streamedResponse}`, 'processing', 10000)
+    return
+  }
+  
+  // Process ready for next command message (essential!)
+  if (result.type === 'ready_for_next' || result.ready_for_next === true) {
+    streamedResponse = ''
+    // The final AI response for the turn arrives in the same frame as the ready signal
+    if (result.ai_response) {
+      console.log('🤖 AI agent response:', result.ai_response);
+      showAIResponse(result.ai_response, result.transcript);
       
-      // Process ready for next command message (essential!)
-      if (result.type === 'ready_for_next' || result.ready_for_next === true) {
-        console.log('🔄 Continuous conversation preparation completed:', result.status);
-        isProcessingCommand = false; // Command processing completed
-        shouldSendAudio = true; // Resume audio sending
-        showNotification(`🔄 ${result.status || 'Ready for next command'}`, 'ready', 2000);
-        
-        // Notify Background Script of completion
-        chrome.runtime.sendMessage({ 
-          type: 'READY_FOR_NEXT_COMMAND',
-          status: result.status || 'Ready for next command',
-          timestamp: result.timestamp
-        });
-        
-        // Initialize state for continuous conversation (essential!)
-        // Keep WebSocket connection and recording active but reset processing state
-        console.log('💬 Continuous conversation mode: Ready to receive next command');
-        
-        // Visual feedback - Update microphone icon status
-        const micIcon = document.querySelector('.voice-recognition-indicator');
-        if (micIcon) {
-          micIcon.classList.add('listening');
-          micIcon.classList.remove('processing', 'completed');
-        }
-        
-        // CRITICAL: Check and restart MediaRecorder if needed
-        if (mediaRecorder) {
-          console.log('🎤 MediaRecorder state:', mediaRecorder.state);
-          if (mediaRecorder.state === 'recording') {
-            console.log('✅ MediaRecorder still recording, ready for next command');
-          } else if (mediaRecorder.state === 'paused') {
-            console.log('▶️ Resuming MediaRecorder for continuous conversation');
-            mediaRecorder.resume();
-          } else {
-            console.log('🔄 MediaRecorder inactive, restarting for continuous conversation');
-            // Restart MediaRecorder with existing stream
-            if (audioStream && audioStream.active) {
-              console.log('🎤 Restarting MediaRecorder with existing stream');
-              // Create new MediaRecorder with existing stream
-              mediaRecorder = new MediaRecorder(audioStream, {
-                mimeType: 'audio/webm;codecs=opus'
-              });
-              
-              // Re-attach data handler
-              mediaRecorder.ondataavailable = (event) => {
-                if (event.data.size > 0 && shouldSendAudio && !isProcessingCommand) {
-                  if (isWebSocketConnected && ws && ws.readyState === WebSocket.OPEN) {
-                    console.log("📤 Sending real-time audio chunk:", event.data.size, "bytes");
-                    ws.send(event.data);
-                  }
-                }
-              };
-              
-              // Start recording
-              mediaRecorder.start(250);
-              isRecording = true;
-              shouldSendAudio = true;
-              console.log('✅ MediaRecorder restarted successfully');
-            } else {
-              console.log('⚠️ Audio stream inactive, need to restart voice recognition');
-              // Stream is dead, need to restart entire voice recognition
-              startVoiceRecognition();
+      chrome.runtime.sendMessage({ 
+        type: 'VOICE_RECOGNITION_RESULT', 
+        transcript: result.transcript,
+        confidence: result.confidence || 1.0,
+        ai_response: result.ai_response,
+        processing: false,
+        timestamp: result.timestamp
+      });
+    }
+    
+    console.log('🔄 Continuous conversation preparation completed:', result.status);
+    isProcessingCommand = false; // Command processing completed
+    shouldSendAudio = true; // Resume audio sending
+    showNotification(`🔄 ${result.status || 'Ready for next command'}`, 'ready', 2000);
+    
+    // Notify Background Script of completion
+    chrome.runtime.sendMessage({ 
+      type: 'READY_FOR_NEXT_COMMAND',
+      status: result.status || 'Ready for next command',
+      timestamp: result.timestamp
+    });
+    
+    // Initialize state for continuous conversation (essential!)
+    // Keep WebSocket connection and recording active but reset processing state
+    console.log('💬 Continuous conversation mode: Ready to receive next command');
+    
+    // Visual feedback - Update microphone icon status
+    const micIcon = document.querySelector('.voice-recognition-indicator');
+    if (micIcon) {
+      micIcon.classList.add('listening');
+      micIcon.classList.remove('processing', 'completed');
+    }
+    
+    // CRITICAL: Check and restart MediaRecorder if needed
+    if (mediaRecorder) {
+      console.log('🎤 MediaRecorder state:', mediaRecorder.state);
+      if (mediaRecorder.state === 'recording') {
+        console.log('✅ MediaRecorder still recording, ready for next command');
+      } else if (mediaRecorder.state === 'paused') {
+        console.log('▶️ Resuming MediaRecorder for continuous conversation');
+        mediaRecorder.resume();
+      } else {
+        console.log('🔄 MediaRecorder inactive, restarting for continuous conversation');
+        // Restart MediaRecorder with existing stream
+        if (audioStream && audioStream.active) {
+          console.log('🎤 Restarting MediaRecorder with existing stream');
+          // Create new MediaRecorder with existing stream
+          mediaRecorder = new MediaRecorder(audioStream, {
+            mimeType: 'audio/webm;codecs=opus'
+          });
+          
+          // Re-attach data handler
+          mediaRecorder.ondataavailable = (event) => {
+            if (event.data.size > 0 && shouldSendAudio && !isProcessingCommand) {
+              if (isWebSocketConnected && ws && ws.readyState === WebSocket.OPEN) {
+                console.log("📤 Sending real-time audio chunk:", event.data.size, "bytes");
+                ws.send(event.data);
+              }
             }
-          }
+          };
+          
+          // Start recording
+          mediaRecorder.start(250);
+          isRecording = true;
+          shouldSendAudio = true;
+          console.log('✅ MediaRecorder restarted successfully');
         } else {
-          console.log('⚠️ MediaRecorder not found, restarting voice recognition');
-          // MediaRecorder doesn't exist, restart voice recognition
+          console.log('⚠️ Audio stream inactive, need to restart voice recognition');
+          // Stream is dead, need to restart entire voice recognition
           startVoiceRecognition();
         }
+      }
+    } else {
+      console.log('⚠️ MediaRecorder not found, restarting voice recognition');
+      // MediaRecorder doesn't exist, restart voice recognition
+      startVoiceRecognition();
+    }
+    
+    // Send keep-alive message to prevent timeout
+    if (ws && ws.readyState === WebSocket.OPEN) {
+      try {
+        ws.send(JSON.stringify({ type: 'KEEP_ALIVE', session_id: result.session_id }));
+        console.log('📡 Sent keep-alive message');
+      } catch (e) {
+        console.error('Failed to send keep-alive:', e);
+      }
+    }
+    
+    return;
+  }
+  
+  if (result.transcript) {
+    console.log('🎯 Real-time recognition result:', result.transcript, `(final: ${result.is_final})`);
+    
+    // Process final result and AI response
+    if (result.is_final) {
+      console.log('✅ Final speech recognition result:', result.transcript);
+      isProcessingCommand = true; // Start command processing
+      shouldSendAudio = false; // Stop sending audio during processing
+      
+      // Show processing status message
+      if (result.processing === true && result.status) {
+        console.log('⏳ Processing status:', result.status);
+        showNotification(`⏳ ${result.status}`, 'processing', 3000);
         
-        // Send keep-alive message to prevent timeout
-        if (ws && ws.readyState === WebSocket.OPEN) {
-          try {
-            ws.send(JSON.stringify({ type: 'KEEP_ALIVE', session_id: result.session_id }));
-            console.log('📡 Sent keep-alive message');
-          } catch (e) {
-            console.error('Failed to send keep-alive:', e);
-          }
+        // Visual feedback - Show processing status
+        const micIcon = document.querySelector('.voice-recognition-indicator');
+        if (micIcon) {
+          micIcon.classList.add('processing');
+          micIcon.classList.remove('listening');
         }
-        
-        return;
       }
       
-      if (result.transcript) {
-        console.log('🎯 Real-time recognition result:', result.transcript, `(final: ${result.is_final})`);
+      // Show AI response to user immediately if there is one
+      if (result.ai_response && result.processing === false) {
+        console.log('🤖 AI agent response:', result.ai_response);
+        showAIResponse(result.ai_response, result.transcript);
         
-        // Process final result and AI response
-        if (result.is_final) {
-          console.log('✅ Final speech recognition result:', result.transcript);
-          isProcessingCommand = true; // Start command processing
-          shouldSendAudio = false; // Stop sending audio during processing
-          
-          // Show processing status message
-          if (result.processing === true && result.status) {
-            console.log('⏳ Processing status:', result.status);
-            showNotification(`⏳ ${result.status}`, 'processing', 3000);
-            
-            // Visual feedback - Show processing status
-            const micIcon = document.querySelector('.voice-recognition-indicator');
-            if (micIcon) {
-              micIcon.classList.add('processing');
-              micIcon.classList.remove('listening');
-            }
-          }
-          
-          // Show AI response to user immediately if there is one
-          if (result.ai_response && result.processing === false) {
-            console.log('🤖 AI agent response:', result.ai_response);
-            showAIResponse(result.ai_response, result.transcript);
-            
-            // Visual feedback - Wait after response completion
-            const micIcon = document.querySelector('.voice-recognition-indicator');
-            if (micIcon) {
-              micIcon.classList.add('completed');
-              micIcon.classList.remove('processing');
-            }
-          }
-          
-          // Notify Background Script of result
-          chrome.runtime.sendMessage({ 
-            type: 'VOICE_RECOGNITION_RESULT', 
-            transcript: result.transcript,
-            confidence: result.confidence || 1.0,
-            ai_response: result.ai_response,
-            processing: result.processing,
-            status: result.status,
-            timestamp: result.timestamp
-          });
-          
-          // If there is an AI response, command processing is completed on the server
-          if (!result.ai_response && result.processing !== true) {
-            chrome.runtime.sendMessage({ 
-              type: 'VOICE_COMMAND', 
-              command: result.transcript 
-            });
-          }
-        } else {
-          // Intermediate result (real-time feedback) - Show only when not processing
-          if (!isProcessingCommand) {
-            console.log('🔄 Intermediate recognition result:', result.transcript);
-            showInterimResult(result.transcript);
-          }
+        // Visual feedback - Wait after response completion
+        const micIcon = document.querySelector('.voice-recognition-indicator');
+        if (micIcon) {
+          micIcon.classList.add('completed');
+          micIcon.classList.remove('processing');
         }
       }
-    } catch (error) {
-      console.error('🚨 WebSocket message processing error:', error);
+      
+      // Notify Background Script of result
+      chrome.runtime.sendMessage({ 
+        type: 'VOICE_RECOGNITION_RESULT', 
+        transcript: result.transcript,
+        confidence: result.confidence || 1.0,
+        ai_response: result.ai_response,
+        processing: result.processing,
+        status: result.status,
+        timestamp: result.timestamp
+      });
+      
+      // If there is an AI response, command processing is completed on the server
+      if (!result.ai_response && result.processing !== true) {
+        chrome.runtime.sendMessage({ 
+          type: 'VOICE_COMMAND', 
+          command: result.transcript 
+        });
+      }
+    } else {
+      // Intermediate result (real-time feedback) - Show only when not processing
+      if (!isProcessingCommand) {
+        console.log('🔄 Intermediate recognition result:', result.transcript);
+        showInterimResult(result.transcript);
+      }
     }
-  };
+  }
 }
 
 // Show AI response to user
@@ -760,29 +793,14 @@ async function sendAudioToServer(audioBlob: Blob) {
     
     console.log("📤 Sending audio to server... (size:", audioBlob.size, "bytes)");
     
-    // Convert Blob to Base64 safely
-    const arrayBuffer = await audioBlob.arrayBuffer();
-    const uint8Array = new Uint8Array(arrayBuffer);
-    
-    // Convert Base64 in chunks (memory efficiency)
-    let base64Audio = '';
-    const chunkSize = 8192; // 8KB chunk
-    
-    for (let i = 0; i < uint8Array.length; i += chunkSize) {
-      const chunk = uint8Array.slice(i, i + chunkSize);
-      const chunkString = String.fromCharCode.apply(null, Array.from(chunk));
-      base64Audio += btoa(chunkString);
-    }
+    // Upload raw audio bytes as multipart form data (no Base64 inflation)
+    const formData = new FormData();
+    formData.append('file', audioBlob, 'audio.webm');
+    formData.append('language_code', 'en-US');
     
     const response = await fetch('http://localhost:8000/api/transcribe', {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        audio_data: base64Audio,
-        language_code: 'en-US'
-      })
+      body: formData
     });
     
     if (!response.ok) {